@@ -0,0 +1,214 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from black_scholes_model import BlackScholesModel
+from config import CONFIG
+from data_processor import DataProcessor
+from market_data_cache import MarketDataCache
+from model_evaluator import MetricsAccumulator
+from option_chain import OptionChain
+
+# Leading underscore keeps the checkpoint out of the output directory when it is read as a Parquet dataset
+CHECKPOINT_FILE = '_checkpoint.json'
+
+def save_snapshot(root, ticker, date, options):
+    """Store one date's preprocessed option chain (DataFrame or OptionChain) for offline backtests."""
+    chain = options if isinstance(options, OptionChain) else OptionChain.from_frame(options)
+    chain.save(os.path.join(root, ticker, pd.Timestamp(date).strftime('%Y-%m-%d')))
+
+def _backtest_date(task):
+    """Filter, price and evaluate one stored snapshot; runs in a worker process."""
+    chain = OptionChain.load(task['chain_dir'])
+    if task['spot'] is not None:
+        chain.underlying_price = task['spot']
+    chain = chain.filter_moneyness(task['moneyness_range'])
+    if task['sigma'] is None:
+        sigma = chain.implied_vol
+    else:
+        sigma = task['sigma']
+    model_price = chain.price(BlackScholesModel(), task['r'], sigma)
+
+    results = pd.DataFrame({
+        'date': task['date'],
+        'strike': chain.strike,
+        'is_call': chain.is_call,
+        'expiry': chain.expiry,
+        'underlying_price': chain.underlying_price,
+        'sigma': np.broadcast_to(sigma, (len(chain),)),
+        'last_price': chain.last_price,
+        'model_price': model_price,
+    })
+    tmp_path = task['output_path'] + '.tmp'
+    results.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, task['output_path'])
+    return task['date'], _accumulate(results)
+
+def _accumulate(results):
+    return MetricsAccumulator().update(results['last_price'], results['model_price'],
+                                       moneyness=results['underlying_price'] / results['strike'],
+                                       expiry=results['expiry'], is_call=results['is_call'])
+
+class BacktestRunner:
+    """Replay stored option chain snapshots over a date range, sharded across processes.
+
+    Snapshots live under root/<ticker>/<YYYY-MM-DD>/ as saved OptionChains
+    and the underlying history is read from a MarketDataCache in offline mode,
+    so a run never touches the network. Preprocessing uses that shared history:
+    it is loaded and its volatility computed once in the parent, and each
+    worker receives the date's closing spot and volatility. Snapshot expiries
+    are already times to expiration from the snapshot date. Each date's priced
+    contracts are written to output_dir/<date>.parquet as soon as it finishes
+    and recorded in a checkpoint, so an interrupted run resumes where it
+    stopped.
+    """
+
+    def __init__(self, root, ticker, output_dir, cache_dir='market_data_cache', r=0.05,
+                 moneyness_range=(0.8, 1.2), volatility_source='historical',
+                 volatility_estimator='close_to_close', volatility_window=252, max_workers=None):
+        if volatility_source not in ('historical', 'implied'):
+            raise ValueError("volatility_source must be 'historical' or 'implied'")
+        self.logger = logging.getLogger(__name__)
+        self.root = root
+        self.ticker = ticker
+        self.output_dir = output_dir
+        self.r = r
+        self.moneyness_range = moneyness_range
+        self.volatility_source = volatility_source
+        self.volatility_window = volatility_window
+        self.data_processor = DataProcessor(cache=MarketDataCache(cache_dir), offline=True,
+                                            volatility_estimator=volatility_estimator,
+                                            volatility_window=volatility_window)
+        self.max_workers = max_workers
+        self._checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+
+    def available_dates(self, start_date=None, end_date=None):
+        """Snapshot dates stored for the ticker, optionally limited to [start_date, end_date]."""
+        ticker_dir = os.path.join(self.root, self.ticker)
+        dates = sorted(name for name in os.listdir(ticker_dir) if os.path.isdir(os.path.join(ticker_dir, name)))
+        if start_date is not None:
+            dates = [d for d in dates if d >= pd.Timestamp(start_date).strftime('%Y-%m-%d')]
+        if end_date is not None:
+            dates = [d for d in dates if d <= pd.Timestamp(end_date).strftime('%Y-%m-%d')]
+        return dates
+
+    def _history_as_of(self, dates):
+        """Closing spot and volatility as of each date, from one load of the cached history.
+
+        Dates the cached history does not reach keep the snapshot's own spot
+        and fall back to a default volatility of 0.2.
+        """
+        as_of = pd.DataFrame(index=pd.to_datetime(dates), columns=['spot', 'sigma'], dtype=float)
+        cached = self.data_processor.cache.history_range(self.ticker)
+        if cached is None:
+            self.logger.warning(f"No cached history for {self.ticker}. Using snapshot spots and a default volatility of 0.2")
+        else:
+            # Enough trading days before the first date to fill the first estimator window,
+            # clamped to what the offline cache actually holds
+            start = max(pd.Timestamp(dates[0]) - pd.offsets.BDay(self.volatility_window + 1), cached[0])
+            end = min(pd.Timestamp(dates[-1]) + pd.Timedelta(days=1), cached[1])
+            history = self.data_processor.fetch_stock_data(self.ticker, start, end)
+            if not history.empty:
+                estimator = self.data_processor.volatility_estimator
+                vols = self.data_processor.estimate_volatility(history)
+                if estimator not in vols:
+                    self.logger.warning(f"History has no OHLC columns for the {estimator} estimator. Using close_to_close")
+                    estimator = 'close_to_close'
+                index = history.index.tz_localize(None) if history.index.tz is not None else history.index
+                frame = pd.DataFrame({'spot': history['Adj Close'].to_numpy(dtype=float),
+                                      'sigma': vols[estimator]}, index=index).ffill()
+                # Only carry the last close forward to dates the history actually reaches
+                frame = frame.reindex(as_of.index, method='ffill', tolerance=pd.Timedelta(days=7))
+                as_of = frame
+
+        missing = as_of['sigma'].isna()
+        if missing.any() and cached is not None:
+            self.logger.warning(f"Not enough history for {int(missing.sum())} dates. Using a default volatility of 0.2")
+        spots = as_of['spot'].to_numpy()
+        sigmas = as_of['sigma'].fillna(0.2).to_numpy()
+        return {date: (None if np.isnan(spot) else float(spot), float(sigma))
+                for date, spot, sigma in zip(dates, spots, sigmas)}
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self._checkpoint_path):
+            return set()
+        with open(self._checkpoint_path) as f:
+            return set(json.load(f)['completed'])
+
+    def _save_checkpoint(self, completed):
+        tmp_path = self._checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'ticker': self.ticker, 'completed': sorted(completed)}, f)
+        os.replace(tmp_path, self._checkpoint_path)
+
+    def run(self, start_date=None, end_date=None):
+        """Backtest every stored date in range and return the merged MetricsAccumulator."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        dates = self.available_dates(start_date, end_date)
+        completed = self._load_checkpoint()
+        todo = [d for d in dates if d not in completed]
+        self.logger.info(f"Backtesting {len(todo)} of {len(dates)} dates for {self.ticker} "
+                         f"({len(dates) - len(todo)} already completed)")
+
+        accumulator = MetricsAccumulator()
+        # Dates finished in an earlier run are folded in from their stored results
+        for date in dates:
+            if date in completed:
+                accumulator.merge(_accumulate(pd.read_parquet(self._output_path(date))))
+
+        as_of = self._history_as_of(todo) if todo else {}
+        tasks = [{
+            'date': date,
+            'chain_dir': os.path.join(self.root, self.ticker, date),
+            'output_path': self._output_path(date),
+            'spot': as_of[date][0],
+            'sigma': as_of[date][1] if self.volatility_source == 'historical' else None,
+            'r': self.r,
+            'moneyness_range': self.moneyness_range,
+        } for date in todo]
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(_backtest_date, task): task['date'] for task in tasks}
+            for future in as_completed(futures):
+                date = futures[future]
+                try:
+                    _, date_accumulator = future.result()
+                except Exception as e:
+                    self.logger.error(f"Backtest failed for {date}: {str(e)}", exc_info=True)
+                    continue
+                accumulator.merge(date_accumulator)
+                completed.add(date)
+                self._save_checkpoint(completed)
+
+        self.logger.info(f"Backtest metrics: {accumulator.result()}")
+        return accumulator
+
+    def _output_path(self, date):
+        return os.path.join(self.output_dir, f'{date}.parquet')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay stored option chain snapshots and evaluate the model offline.")
+    parser.add_argument('root', help="snapshot directory containing <ticker>/<YYYY-MM-DD>/ option chains")
+    parser.add_argument('--ticker', default=CONFIG['TICKER'])
+    parser.add_argument('--start', default=CONFIG['START_DATE'])
+    parser.add_argument('--end', default=CONFIG['END_DATE'])
+    parser.add_argument('--output', default='backtest_results', help="directory for per-date Parquet results")
+    parser.add_argument('--cache-dir', default=CONFIG['CACHE_DIR'], help="market data cache holding the underlying history")
+    parser.add_argument('--volatility-source', default='historical', choices=['historical', 'implied'])
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    runner = BacktestRunner(args.root, args.ticker, args.output, cache_dir=args.cache_dir,
+                            r=CONFIG['RISK_FREE_RATE'], volatility_source=args.volatility_source,
+                            volatility_estimator=CONFIG['VOLATILITY_ESTIMATOR'],
+                            volatility_window=CONFIG['VOLATILITY_WINDOW'], max_workers=args.workers)
+    logging.info(f"Backtest breakdown:\n{runner.run(args.start, args.end).grouped().to_string()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
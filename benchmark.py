@@ -0,0 +1,282 @@
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from black_scholes_model import FAST_CDF_MAX_ERROR, BlackScholesModel
+from synthetic_data import generate_option_chain, generate_stock_history, split_calls_puts
+
+def _scalar_case(method, with_type=False):
+    """Benchmark a scalar BlackScholesModel method called once per contract."""
+    def setup(model, chain, r):
+        rows = list(zip(chain['UnderlyingPrice'], chain['strike'], chain['TimeToExpiration'],
+                        chain['ImpliedVolatility'], chain['optionType']))
+        fn = getattr(model, method)
+        if with_type:
+            return lambda: [fn(S, K, T, r, sigma, option_type) for S, K, T, sigma, option_type in rows]
+        return lambda: [fn(S, K, T, r, sigma) for S, K, T, sigma, _ in rows]
+    return setup
+
+# Max absolute error of float32 arithmetic per unit of price scale
+FLOAT32_MAX_ERROR = 1e-6
+
+def _batch_case(method, precision=None, dtype=None):
+    """Benchmark a vectorized BlackScholesModel method over the whole chain.
+
+    With a precision or dtype the case runs on its own model and also reports
+    its max absolute error against the default exact float64 model. The case
+    fails when that error exceeds the CDF error bound scaled by the largest
+    S + K and 1 + T in the chain (prices, theta and rho multiply N(d) by S, K
+    and K * T).
+    """
+    def setup(model, chain, r):
+        args = [chain[c].to_numpy() for c in ('UnderlyingPrice', 'strike', 'TimeToExpiration')]
+        sigma = chain['ImpliedVolatility'].to_numpy()
+        option_type = chain['optionType'].to_numpy()
+        fn = getattr(model, method)
+        if precision is None and dtype is None:
+            return lambda: fn(*args, r, sigma, option_type)
+        variant = getattr(BlackScholesModel(precision or 'exact', dtype or np.float64), method)
+        run = lambda: variant(*args, r, sigma, option_type)
+        run.reference = lambda: fn(*args, r, sigma, option_type)
+        unit_error = FAST_CDF_MAX_ERROR if precision == 'fast' else 0.0
+        if dtype == np.float32:
+            unit_error += FLOAT32_MAX_ERROR
+        run.max_error = unit_error * np.max(args[0] + args[1]) * np.max(1 + args[2])
+        return run
+    return setup
+
+def _cdf_case(precision):
+    """Benchmark the normal CDF alone on the chain's d1 values."""
+    def setup(model, chain, r):
+        d1 = model.d1(chain['UnderlyingPrice'].to_numpy(), chain['strike'].to_numpy(),
+                      chain['TimeToExpiration'].to_numpy(), r, chain['ImpliedVolatility'].to_numpy())
+        if precision == 'exact':
+            return lambda: model.norm_cdf(d1)
+        fast_cdf = BlackScholesModel(precision).norm_cdf
+        run = lambda: fast_cdf(d1)
+        run.reference = lambda: model.norm_cdf(d1)
+        run.max_error = FAST_CDF_MAX_ERROR
+        return run
+    return setup
+
+def _lattice_case(method):
+    """Benchmark the American lattice pricer over the whole chain."""
+    def setup(model, chain, r):
+        from lattice_model import LatticeModel
+        lattice = LatticeModel(method=method)
+        args = [chain[c].to_numpy() for c in ('UnderlyingPrice', 'strike', 'TimeToExpiration')]
+        sigma = chain['ImpliedVolatility'].to_numpy()
+        option_type = chain['optionType'].to_numpy()
+        return lambda: lattice.price_batch(*args, r, sigma, option_type)
+    return setup
+
+def _quiet(fn, logger_name):
+    """Run fn with the named logger raised to WARNING, so timings exclude its INFO logging."""
+    def run():
+        logger = logging.getLogger(logger_name)
+        level = logger.level
+        logger.setLevel(logging.WARNING)
+        try:
+            return fn()
+        finally:
+            logger.setLevel(level)
+    return run
+
+def _streaming_case(tolerance, ticks=50, seed=0):
+    """Walk a StreamingRepricer through random spot, vol and time ticks.
+
+    Every tick's prices are compared with a full reprice at the same spot, vol
+    and remaining time to expiry, and the case fails when any is off by more
+    than the repricer's tolerance.
+    """
+    def setup(model, chain, r):
+        from streaming_repricer import StreamingRepricer
+        K, T = chain['strike'].to_numpy(), chain['TimeToExpiration'].to_numpy()
+        sigma = chain['ImpliedVolatility'].to_numpy()
+        option_type = chain['optionType'].to_numpy()
+        spot = float(chain['UnderlyingPrice'].iloc[0])
+        rng = np.random.default_rng(seed)
+        spots = spot * np.exp(np.cumsum(0.002 * rng.standard_normal(ticks)))
+        vol_shifts = np.cumsum(0.002 * rng.standard_normal(ticks))
+        # One to ten minutes between ticks
+        elapsed = rng.uniform(1, 10, ticks) / (365 * 24 * 60)
+        expiry = np.maximum(T - np.cumsum(elapsed)[:, None], 0.0)
+
+        def run():
+            repricer = StreamingRepricer(model, K, T, option_type, spot, r, sigma, tolerance)
+            return np.stack([repricer.update(S, vol=sigma + shift, elapsed=e)['price']
+                             for S, shift, e in zip(spots, vol_shifts, elapsed)])
+        run.reference = lambda: np.stack([model.price_batch(S, K, expiry[i], r, sigma + shift, option_type)
+                                          for i, (S, shift) in enumerate(zip(spots, vol_shifts))])
+        run.max_error = tolerance
+        return run
+    return setup
+
+def _preprocess_case(model, chain, r):
+    from data_processor import DataProcessor
+    processor = DataProcessor()
+    stock_data = generate_stock_history()
+    calls, puts = split_calls_puts(chain)
+    return _quiet(lambda: processor.preprocess_data(stock_data.copy(), calls.copy(), puts.copy(), '2030-01-18'),
+                  'data_processor')
+
+def _filter_case(model, chain, r):
+    from data_processor import DataProcessor
+    processor = DataProcessor()
+    return lambda: processor.filter_options(chain.copy())
+
+def _metrics_case(model, chain, r):
+    from model_evaluator import ModelEvaluator
+    evaluator = ModelEvaluator()
+    model_price = model.price_batch(chain['UnderlyingPrice'], chain['strike'], chain['TimeToExpiration'],
+                                    r, chain['ImpliedVolatility'], chain['optionType'])
+    market_price = chain['lastPrice'].to_numpy()
+    return _quiet(lambda: evaluator.calculate_metrics(market_price, model_price), 'model_evaluator')
+
+# name -> (setup, capped); the per-contract scalar methods, the O(steps^2) lattice
+# pricers and the streaming walks, which keep every tick's prices for the accuracy
+# check, are capped at --scalar-limit contracts
+CASES = {
+    'call_price': (_scalar_case('call_price'), True),
+    'put_price': (_scalar_case('put_price'), True),
+    'delta': (_scalar_case('delta', with_type=True), True),
+    'gamma': (_scalar_case('gamma'), True),
+    'vega': (_scalar_case('vega'), True),
+    'theta': (_scalar_case('theta', with_type=True), True),
+    'rho': (_scalar_case('rho', with_type=True), True),
+    'price_batch': (_batch_case('price_batch'), False),
+    'greeks': (_batch_case('greeks'), False),
+    # Precision modes, each reporting its max absolute error against the exact float64 results
+    'norm_cdf': (_cdf_case('exact'), False),
+    'norm_cdf_fast': (_cdf_case('fast'), False),
+    'price_batch_fast': (_batch_case('price_batch', precision='fast'), False),
+    'greeks_fast': (_batch_case('greeks', precision='fast'), False),
+    'price_batch_float32': (_batch_case('price_batch', dtype=np.float32), False),
+    'price_batch_fast_float32': (_batch_case('price_batch', precision='fast', dtype=np.float32), False),
+    'lattice_binomial': (_lattice_case('binomial'), True),
+    'lattice_trinomial': (_lattice_case('trinomial'), True),
+    # Streaming repricer walks, failing when any tick is off by more than the tolerance
+    'streaming_repricer': (_streaming_case(1e-4), True),
+    'streaming_repricer_loose': (_streaming_case(1e-2), True),
+    'preprocess_data': (_preprocess_case, False),
+    'filter_options': (_filter_case, False),
+    'calculate_metrics': (_metrics_case, False),
+}
+
+def run_case(setup, model, chain, r, repeat):
+    """Time a case (best of repeat runs) and measure its peak traced memory in one extra run."""
+    fn = setup(model, chain, r)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    output = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        'n_contracts': len(chain),
+        'seconds': best,
+        'contracts_per_sec': len(chain) / best if best > 0 else float('inf'),
+        'peak_memory_mb': peak / 1024 ** 2,
+    }
+    if hasattr(fn, 'reference'):
+        result['max_abs_error'] = _max_abs_error(output, fn.reference())
+        result['max_error_bound'] = float(fn.max_error)
+        result['accuracy_ok'] = bool(result['max_abs_error'] <= fn.max_error)
+    return result
+
+def _max_abs_error(output, reference):
+    if isinstance(output, dict):
+        return max(_max_abs_error(output[name], reference[name]) for name in output)
+    return float(np.nanmax(np.abs(np.asarray(output, dtype=float) - reference)))
+
+def run_benchmarks(sizes, cases=None, scalar_limit=10_000, repeat=3, r=0.05, seed=0):
+    """Run the selected cases over synthetic chains of each size and return a results dict."""
+    logger = logging.getLogger(__name__)
+    model = BlackScholesModel()
+    results = {}
+    for n in sizes:
+        chain = generate_option_chain(n, r=r, seed=seed)
+        for name in cases or CASES:
+            setup, capped = CASES[name]
+            key = f"{name}@{n}"
+            if capped and n > scalar_limit:
+                continue
+            try:
+                results[key] = run_case(setup, model, chain, r, repeat)
+            except ImportError as e:
+                logger.warning(f"Skipping {key}: {str(e)}")
+                results[key] = {'skipped': str(e)}
+                continue
+            error = results[key].get('max_abs_error')
+            logger.info(f"{key}: {results[key]['contracts_per_sec']:.0f} contracts/sec, "
+                        f"peak {results[key]['peak_memory_mb']:.1f} MB"
+                        + (f", max abs error {error:.2e} (bound {results[key]['max_error_bound']:.2e})"
+                           if error is not None else ""))
+    return results
+
+def find_accuracy_failures(results):
+    """Return (key, error, bound) for precision cases whose error exceeded their bound."""
+    return [(key, result['max_abs_error'], result['max_error_bound'])
+            for key, result in results.items() if result.get('accuracy_ok') is False]
+
+def find_regressions(results, baseline, threshold):
+    """Return (key, baseline, current) for cases whose throughput dropped by more than threshold."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous or 'skipped' in current or 'skipped' in previous:
+            continue
+        if current['contracts_per_sec'] < previous['contracts_per_sec'] * (1 - threshold):
+            regressions.append((key, previous['contracts_per_sec'], current['contracts_per_sec']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Black-Scholes pricing hot paths on synthetic chains.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10_000, 1_000_000],
+                        help="contract counts to benchmark (1e2 to 1e7)")
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), help="subset of cases to run")
+    parser.add_argument('--scalar-limit', type=int, default=10_000,
+                        help="largest chain to run the per-contract scalar methods and lattice pricers on")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="previous results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="fail if throughput drops by more than this fraction versus the baseline")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    results = run_benchmarks(args.sizes, args.cases, args.scalar_limit, args.repeat, seed=args.seed)
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"Benchmark results saved as '{args.output}'")
+
+    failed = False
+    for key, error, bound in find_accuracy_failures(results):
+        logging.error(f"Accuracy failure in {key}: max abs error {error:.2e} exceeds {bound:.2e}")
+        failed = True
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = find_regressions(results, baseline, args.threshold)
+        for key, previous, current in regressions:
+            logging.error(f"Regression in {key}: {previous:.0f} -> {current:.0f} contracts/sec")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,91 @@
+import math
 import numpy as np
-from scipy.stats import norm
 import logging
 
+PRECISIONS = ('exact', 'fast')
+
+_SQRT1_2 = math.sqrt(0.5)
+# Python float rather than a NumPy scalar so float32 arrays are not promoted to float64
+_INV_SQRT_2PI = 1 / math.sqrt(2 * math.pi)
+
+def norm_pdf(x):
+    """Standard normal density."""
+    return np.exp(-0.5 * np.square(x)) * _INV_SQRT_2PI
+
+def norm_cdf(x):
+    """Standard normal CDF via scipy.special.ndtr, the function scipy.stats.norm.cdf evaluates.
+
+    scipy is imported on first use so the fast precision mode runs on NumPy alone.
+    """
+    from scipy.special import ndtr
+    return ndtr(x)
+
+# The fast CDF linearly interpolates a table on [-8.5, 8.5] with a step of 1/1024. The
+# interpolation error is at most step**2 / 8 * max|pdf'| ~ 3e-8; outside the table the
+# CDF is within 1e-17 of 0 or 1 and is clamped to the end points.
+_FAST_CDF_LIMIT = 8.5
+_FAST_CDF_STEPS = 1024
+# Documented max absolute error of fast_norm_cdf on float64 inputs; benchmark.py fails past it
+FAST_CDF_MAX_ERROR = 3e-8
+_fast_cdf_tables = {}
+
+def _fast_cdf_table(dtype):
+    if dtype not in _fast_cdf_tables:
+        grid = np.linspace(-_FAST_CDF_LIMIT, _FAST_CDF_LIMIT, int(2 * _FAST_CDF_LIMIT * _FAST_CDF_STEPS) + 1)
+        values = np.array([0.5 * math.erfc(-x * _SQRT1_2) for x in grid])
+        slopes = np.append(np.diff(values), 0.0)
+        _fast_cdf_tables[dtype] = (values.astype(dtype), slopes.astype(dtype))
+    return _fast_cdf_tables[dtype]
+
+def fast_norm_cdf(x):
+    """Standard normal CDF from a precomputed interpolation table, using NumPy only.
+
+    Max absolute error versus the exact CDF is about 3e-8 for float64 arrays.
+    float32 arrays are evaluated in float32 with a max error of about 3e-7,
+    dominated by float32 rounding. Scalars, including 0-d arrays, use math.erfc
+    and are exact.
+    """
+    if np.ndim(x) == 0:
+        return 0.5 * math.erfc(-float(x) * _SQRT1_2)
+    x = np.asarray(x)
+    dtype = np.float32 if x.dtype == np.float32 else np.float64
+    values, slopes = _fast_cdf_table(dtype)
+    u = np.clip(x, -_FAST_CDF_LIMIT, _FAST_CDF_LIMIT - 1 / _FAST_CDF_STEPS).astype(dtype, copy=False)
+    nan = np.isnan(u)
+    u[nan] = 0.0
+    u += _FAST_CDF_LIMIT
+    u *= _FAST_CDF_STEPS
+    i = u.astype(np.intp)
+    u -= i
+    out = slopes[i]
+    out *= u
+    out += values[i]
+    out[nan] = np.nan
+    return out
+
 class BlackScholesModel:
-    def __init__(self):
+    def __init__(self, precision='exact', dtype=np.float64):
+        """precision selects the normal CDF used by every price and Greek.
+
+        'exact' uses scipy.special.ndtr. 'fast' uses fast_norm_cdf, which has a
+        max absolute CDF error of about 3e-8 and needs only NumPy. On 1M contracts
+        (benchmark.py norm_cdf and *_fast cases) it evaluates about 2.2x faster
+        than ndtr, which makes price_batch about 1.2x and greeks about 1.1x
+        faster: the two CDFs are a small part of either kernel's array passes.
+        dtype=np.float32 runs price_batch and greeks in single precision,
+        halving memory for very large scenario runs. implied_vol always solves in
+        float64.
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}")
         self.logger = logging.getLogger(__name__)
+        self.precision = precision
+        self.dtype = np.dtype(dtype)
+        if precision == 'exact':
+            from scipy.special import ndtr
+            self.norm_cdf = ndtr
+        else:
+            self.norm_cdf = fast_norm_cdf
 
     def d1(self, S, K, T, r, sigma):
         return (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
@@ -13,64 +94,231 @@ class BlackScholesModel:
         return self.d1(S, K, T, r, sigma) - sigma * np.sqrt(T)
 
     def call_price(self, S, K, T, r, sigma):
-        self.logger.debug(f"Calculating call price: S={S}, K={K}, T={T}, r={r}, sigma={sigma}")
+        # Lazy %-formatting so production runs pay nothing per contract for debug logging
+        self.logger.debug("Calculating call price: S=%s, K=%s, T=%s, r=%s, sigma=%s", S, K, T, r, sigma)
         if np.isnan(sigma) or sigma <= 0 or T < 0:
-            self.logger.warning(f"Invalid input for call price: sigma={sigma}, T={T}")
+            self.logger.warning("Invalid input for call price: sigma=%s, T=%s", sigma, T)
             return np.nan
         if T == 0:
             return max(S - K, 0)  # Intrinsic value at expiration
         d1 = self.d1(S, K, T, r, sigma)
         d2 = self.d2(S, K, T, r, sigma)
-        price = S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
-        self.logger.debug(f"Calculated call price: {price}")
+        price = S * self.norm_cdf(d1) - K * np.exp(-r * T) * self.norm_cdf(d2)
+        self.logger.debug("Calculated call price: %s", price)
         return price
 
     def put_price(self, S, K, T, r, sigma):
-        self.logger.debug(f"Calculating put price: S={S}, K={K}, T={T}, r={r}, sigma={sigma}")
+        # Lazy %-formatting so production runs pay nothing per contract for debug logging
+        self.logger.debug("Calculating put price: S=%s, K=%s, T=%s, r=%s, sigma=%s", S, K, T, r, sigma)
         if np.isnan(sigma) or sigma <= 0 or T < 0:
-            self.logger.warning(f"Invalid input for put price: sigma={sigma}, T={T}")
+            self.logger.warning("Invalid input for put price: sigma=%s, T=%s", sigma, T)
             return np.nan
         if T == 0:
             return max(K - S, 0)  # Intrinsic value at expiration
         d1 = self.d1(S, K, T, r, sigma)
         d2 = self.d2(S, K, T, r, sigma)
-        price = K * np.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
-        self.logger.debug(f"Calculated put price: {price}")
+        price = K * np.exp(-r * T) * self.norm_cdf(-d2) - S * self.norm_cdf(-d1)
+        self.logger.debug("Calculated put price: %s", price)
         return price
 
+    @staticmethod
+    def _is_call(option_type, shape):
+        """Broadcast an option type (scalar or array of 'call'/'put') to a boolean call mask."""
+        option_type = np.asarray(option_type)
+        if option_type.dtype == bool:
+            return np.broadcast_to(option_type, shape)
+        is_call = option_type == 'call'
+        # Only the non-calls still need comparing, which matters for object arrays of strings
+        if not np.all(is_call) and not np.all(option_type[~is_call] == 'put'):
+            raise ValueError("option_type must be 'call' or 'put'")
+        return np.broadcast_to(is_call, shape)
+
+    @classmethod
+    def _broadcast_inputs(cls, inputs, option_type, dtype=np.float64):
+        """Broadcast numeric inputs and option_type together; returns (arrays, is_call)."""
+        *arrays, option_type = np.broadcast_arrays(*(np.asarray(x, dtype=dtype) for x in inputs),
+                                                   np.asarray(option_type))
+        return arrays, cls._is_call(option_type, option_type.shape)
+
+    def _prepare_batch(self, S, K, T, r, sigma, option_type):
+        """Broadcast batch inputs and split contracts into live, expired and invalid masks."""
+        (S, K, T, r, sigma), is_call = self._broadcast_inputs((S, K, T, r, sigma), option_type, self.dtype)
+
+        invalid = np.isnan(S) | np.isnan(K) | np.isnan(T) | np.isnan(r) | np.isnan(sigma) | (sigma <= 0) | (T < 0)
+        expired = ~invalid & (T == 0)
+
+        n_invalid = int(np.count_nonzero(invalid))
+        if n_invalid:
+            self.logger.warning(f"Invalid input for {n_invalid} contracts in batch (NaN, sigma <= 0 or T < 0)")
+        return S, K, T, r, sigma, is_call, invalid, expired
+
+    def price_batch(self, S, K, T, r, sigma, option_type='call'):
+        """Price a mixed call/put chain in a single broadcasted pass.
+
+        All inputs may be scalars, NumPy arrays or pandas Series. Contracts with
+        NaN inputs, sigma <= 0 or T < 0 are priced as NaN; contracts at T == 0
+        are priced at intrinsic value.
+        """
+        S, K, T, r, sigma, is_call, invalid, expired = self._prepare_batch(S, K, T, r, sigma, option_type)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sqrt_T = np.sqrt(T)
+            d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * sqrt_T)
+            d2 = d1 - sigma * sqrt_T
+            discounted_K = K * np.exp(-r * T)
+            # Calls and puts share one formula, sign * (S N(sign d1) - K e^-rT N(sign d2)),
+            # so each contract needs two cdf evaluations rather than four
+            sign = np.where(is_call, S.dtype.type(1), S.dtype.type(-1))
+            d1 *= sign
+            d2 *= sign
+            prices = sign * (S * self.norm_cdf(d1) - discounted_K * self.norm_cdf(d2))
+
+        if expired.any():
+            intrinsic = np.where(is_call, np.maximum(S - K, 0), np.maximum(K - S, 0))
+            prices = np.where(expired, intrinsic, prices)
+        if invalid.any():
+            prices = np.where(invalid, np.nan, prices)
+        return np.asarray(prices)
+
+    def greeks(self, S, K, T, r, sigma, option_type='call'):
+        """Compute delta, gamma, vega, theta and rho from one shared evaluation of d1, d2, pdf and cdf.
+
+        Accepts the same scalar/array inputs as price_batch and returns a dict of
+        arrays keyed by Greek name. Expired contracts get the same values as the
+        scalar Greeks; invalid contracts get NaN.
+        """
+        S, K, T, r, sigma, is_call, invalid, expired = self._prepare_batch(S, K, T, r, sigma, option_type)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sqrt_T = np.sqrt(T)
+            d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * sqrt_T)
+            d2 = d1 - sigma * sqrt_T
+            pdf_d1 = norm_pdf(d1)
+            cdf_d1 = self.norm_cdf(d1)
+            # Signed so that cdf_d2 is N(d2) for calls and N(-d2) for puts
+            sign = np.where(is_call, S.dtype.type(1), S.dtype.type(-1))
+            cdf_d2 = self.norm_cdf(sign * d2)
+            discounted_K = K * np.exp(-r * T)
+
+            delta = np.where(is_call, cdf_d1, cdf_d1 - 1)
+            gamma = pdf_d1 / (S * sigma * sqrt_T)
+            vega = S * pdf_d1 * sqrt_T
+            theta = -(S * pdf_d1 * sigma) / (2 * sqrt_T) - sign * r * discounted_K * cdf_d2
+            rho = sign * T * discounted_K * cdf_d2
+
+        expired_delta = np.where(S > K, 1.0, np.where(S < K, 0.0, 0.5))
+        expired_delta = np.where(is_call, expired_delta, expired_delta - 1)
+        result = {
+            'delta': np.where(expired, expired_delta, delta),
+            'gamma': np.where(expired, 0.0, gamma),
+            'vega': np.where(expired, 0.0, vega),
+            'theta': np.where(expired, 0.0, theta),
+            'rho': np.where(expired, 0.0, rho),
+        }
+        return {name: np.where(invalid, np.nan, values).astype(S.dtype, copy=False) for name, values in result.items()}
+
+    def _price_and_vega(self, S, K, T, r, sigma, is_call):
+        """Raw Black-Scholes price and vega for already-validated live contracts."""
+        sqrt_T = np.sqrt(T)
+        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * sqrt_T)
+        d2 = d1 - sigma * sqrt_T
+        discounted_K = K * np.exp(-r * T)
+        call = S * self.norm_cdf(d1) - discounted_K * self.norm_cdf(d2)
+        # Put via put-call parity, avoids two extra cdf evaluations
+        price = np.where(is_call, call, call - S + discounted_K)
+        vega = S * norm_pdf(d1) * sqrt_T
+        return price, vega
+
+    def implied_vol(self, price, S, K, T, r, option_type='call', tol=1e-8, max_iter=100,
+                    sigma_bounds=(1e-6, 5.0)):
+        """Solve implied volatility for a whole chain at once.
+
+        Runs a vectorized Newton iteration on vega, safeguarded by a per-contract
+        bracket that falls back to bisection whenever the Newton step leaves the
+        bracket or vega vanishes (deep ITM/OTM and near-expiry contracts).
+        Prices outside the no-arbitrage bounds, expired contracts and NaN inputs
+        get NaN and are reported as not converged.
+
+        Returns a dict with 'implied_vol', 'converged' and 'iterations' arrays.
+        """
+        (price, S, K, T, r), is_call = self._broadcast_inputs((price, S, K, T, r), option_type)
+
+        iv = np.full(S.shape, np.nan)
+        converged = np.zeros(S.shape, dtype=bool)
+        iterations = np.zeros(S.shape, dtype=int)
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            discounted_K = K * np.exp(-r * T)
+            lower = np.where(is_call, np.maximum(S - discounted_K, 0), np.maximum(discounted_K - S, 0))
+            upper = np.where(is_call, S, discounted_K)
+            solvable = (T > 0) & (price > lower) & (price < upper) & (S > 0) & (K > 0)
+            solvable &= ~(np.isnan(price) | np.isnan(S) | np.isnan(K) | np.isnan(T) | np.isnan(r))
+
+            idx = np.flatnonzero(solvable)
+            p, s, k, t, rr, c = (a.ravel()[idx] for a in (price, S, K, T, r, is_call))
+            lo = np.full(idx.size, sigma_bounds[0])
+            hi = np.full(idx.size, sigma_bounds[1])
+            # Brenner-Subrahmanyam approximation as the starting point
+            sigma = np.clip(np.sqrt(2 * np.pi / t) * p / s, lo, hi)
+
+            for iteration in range(1, max_iter + 1):
+                if idx.size == 0:
+                    break
+                model_price, vega = self._price_and_vega(s, k, t, rr, sigma, c)
+                diff = model_price - p
+                done = np.abs(diff) < tol
+
+                flat = iv.ravel()
+                flat[idx[done]] = sigma[done]
+                converged.ravel()[idx[done]] = True
+                iterations.ravel()[idx] = iteration
+
+                hi = np.where(diff > 0, sigma, hi)
+                lo = np.where(diff < 0, sigma, lo)
+                newton = sigma - diff / vega
+                use_bisection = ~np.isfinite(newton) | (newton <= lo) | (newton >= hi)
+                sigma = np.where(use_bisection, 0.5 * (lo + hi), newton)
+
+                keep = ~done
+                idx, p, s, k, t, rr, c = (a[keep] for a in (idx, p, s, k, t, rr, c))
+                lo, hi, sigma = lo[keep], hi[keep], sigma[keep]
+
+        n_failed = int(np.count_nonzero(~converged))
+        if n_failed:
+            self.logger.warning(f"Implied volatility did not converge for {n_failed} of {converged.size} contracts")
+        return {'implied_vol': iv, 'converged': converged, 'iterations': iterations}
+
     def delta(self, S, K, T, r, sigma, option_type='call'):
+        if option_type not in ('call', 'put'):
+            raise ValueError("option_type must be 'call' or 'put'")
         if T == 0:
-            return 1 if S > K else 0 if S < K else 0.5
-        d1 = self.d1(S, K, T, r, sigma)
-        if option_type == 'call':
-            return norm.cdf(d1)
-        elif option_type == 'put':
-            return norm.cdf(d1) - 1
+            call_delta = 1 if S > K else 0 if S < K else 0.5
         else:
-            raise ValueError("option_type must be 'call' or 'put'")
+            call_delta = self.norm_cdf(self.d1(S, K, T, r, sigma))
+        return call_delta if option_type == 'call' else call_delta - 1
 
     def gamma(self, S, K, T, r, sigma):
         if T == 0:
             return 0
         d1 = self.d1(S, K, T, r, sigma)
-        return norm.pdf(d1) / (S * sigma * np.sqrt(T))
+        return norm_pdf(d1) / (S * sigma * np.sqrt(T))
 
     def vega(self, S, K, T, r, sigma):
         if T == 0:
             return 0
         d1 = self.d1(S, K, T, r, sigma)
-        return S * norm.pdf(d1) * np.sqrt(T)
+        return S * norm_pdf(d1) * np.sqrt(T)
 
     def theta(self, S, K, T, r, sigma, option_type='call'):
         if T == 0:
             return 0
         d1 = self.d1(S, K, T, r, sigma)
         d2 = self.d2(S, K, T, r, sigma)
-        common_term = -(S * norm.pdf(d1) * sigma) / (2 * np.sqrt(T))
+        common_term = -(S * norm_pdf(d1) * sigma) / (2 * np.sqrt(T))
         if option_type == 'call':
-            return common_term - r * K * np.exp(-r * T) * norm.cdf(d2)
+            return common_term - r * K * np.exp(-r * T) * self.norm_cdf(d2)
         elif option_type == 'put':
-            return common_term + r * K * np.exp(-r * T) * norm.cdf(-d2)
+            return common_term + r * K * np.exp(-r * T) * self.norm_cdf(-d2)
         else:
             raise ValueError("option_type must be 'call' or 'put'")
 
@@ -79,8 +327,8 @@ class BlackScholesModel:
             return 0
         d2 = self.d2(S, K, T, r, sigma)
         if option_type == 'call':
-            return K * T * np.exp(-r * T) * norm.cdf(d2)
+            return K * T * np.exp(-r * T) * self.norm_cdf(d2)
         elif option_type == 'put':
-            return -K * T * np.exp(-r * T) * norm.cdf(-d2)
+            return -K * T * np.exp(-r * T) * self.norm_cdf(-d2)
         else:
             raise ValueError("option_type must be 'call' or 'put'")
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""Command-line entry point for pricing, Greeks and implied volatility on CSV contracts.
+
+The price, greeks and iv subcommands read contracts from a CSV file or stdin
+and only load the pricing kernel. They default to the NumPy-only fast normal
+CDF, so scipy is not imported unless --precision exact is passed; data
+fetching, plotting and metrics modules are imported lazily by the analyze
+subcommand, so short-lived pricing workers start quickly.
+"""
+import argparse
+import csv
+import logging
+import sys
+import numpy as np
+
+# Canonical input columns and the pipeline's DataFrame column names accepted for them
+ALIASES = {
+    'S': ('S', 'UnderlyingPrice', 'spot'),
+    'K': ('K', 'strike'),
+    'T': ('T', 'TimeToExpiration'),
+    'r': ('r', 'rate'),
+    'sigma': ('sigma', 'ImpliedVolatility', 'ModelVolatility'),
+    'option_type': ('option_type', 'optionType'),
+    'price': ('price', 'lastPrice'),
+}
+
+def read_contracts(stream):
+    """Read a CSV of contracts into (header, rows, columns) with canonical column names."""
+    reader = csv.reader(stream)
+    header = next(reader, [])
+    rows = list(reader)
+    columns = {}
+    for name, aliases in ALIASES.items():
+        for alias in aliases:
+            if alias in header:
+                i = header.index(alias)
+                columns[name] = [row[i] for row in rows]
+                break
+    return header, rows, columns
+
+def _inputs(columns, names, defaults):
+    values = []
+    for name in names:
+        if name in columns:
+            values.append(np.asarray(columns[name], dtype=float))
+        elif defaults.get(name) is not None:
+            values.append(float(defaults[name]))
+        else:
+            raise ValueError(f"Missing input column '{name}' (or pass --{name})")
+    return values
+
+def _option_type(columns, default):
+    if 'option_type' in columns:
+        return np.char.lower(np.asarray(columns['option_type'], dtype=str))
+    return default
+
+def write_results(stream, header, rows, results):
+    """Write the input rows with one extra column per result array."""
+    writer = csv.writer(stream)
+    writer.writerow(header + list(results))
+    for i, row in enumerate(rows):
+        writer.writerow(row + [results[name][i].item() for name in results])
+
+def run_pricing(args, stream_in, stream_out):
+    from black_scholes_model import BlackScholesModel
+
+    header, rows, columns = read_contracts(stream_in)
+    model = BlackScholesModel(precision=args.precision)
+    defaults = {'S': args.S, 'r': args.r, 'sigma': args.sigma}
+    option_type = _option_type(columns, args.option_type)
+    n = len(rows)
+
+    if args.command == 'price':
+        S, K, T, r, sigma = _inputs(columns, ('S', 'K', 'T', 'r', 'sigma'), defaults)
+        results = {'model_price': np.broadcast_to(model.price_batch(S, K, T, r, sigma, option_type), (n,))}
+    elif args.command == 'greeks':
+        S, K, T, r, sigma = _inputs(columns, ('S', 'K', 'T', 'r', 'sigma'), defaults)
+        results = {name: np.broadcast_to(values, (n,))
+                   for name, values in model.greeks(S, K, T, r, sigma, option_type).items()}
+    else:
+        price, S, K, T, r = _inputs(columns, ('price', 'S', 'K', 'T', 'r'), defaults)
+        solved = model.implied_vol(price, S, K, T, r, option_type)
+        results = {name: np.broadcast_to(values, (n,)) for name, values in solved.items()}
+
+    write_results(stream_out, header, rows, results)
+
+def run_analyze(args):
+    # The full pipeline pulls in yfinance, pandas, matplotlib and scikit-learn, so load it only here
+    from main import main as run_pipeline
+    run_pipeline()
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Black-Scholes option pricing tools.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for command, help_text in [('price', "price contracts"), ('greeks', "compute delta, gamma, vega, theta and rho"),
+                               ('iv', "solve implied volatility from market prices")]:
+        sub = subparsers.add_parser(command, help=help_text)
+        sub.add_argument('input', nargs='?', default='-', help="contracts CSV, '-' for stdin")
+        sub.add_argument('-o', '--output', default='-', help="results CSV, '-' for stdout")
+        sub.add_argument('--S', type=float, help="underlying price when there is no S column")
+        sub.add_argument('--r', type=float, default=None, help="risk-free rate when there is no r column")
+        sub.add_argument('--sigma', type=float, help="volatility when there is no sigma column")
+        sub.add_argument('--option-type', default='call', choices=['call', 'put'],
+                         help="option type when there is no option_type column")
+        sub.add_argument('--precision', default='fast', choices=['exact', 'fast'],
+                         help="normal CDF: 'fast' (NumPy only, max error ~3e-8) or 'exact' (imports scipy)")
+    subparsers.add_parser('analyze', help="run the full fetch, price, evaluate and plot pipeline")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+    if args.command == 'analyze':
+        run_analyze(args)
+        return 0
+
+    if args.r is None:
+        # Only fall back to the configured rate when the input has no rate column
+        from config import CONFIG
+        args.r = CONFIG['RISK_FREE_RATE']
+    stream_in = sys.stdin if args.input == '-' else open(args.input, newline='')
+    stream_out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        run_pricing(args, stream_in, stream_out)
+    except ValueError as e:
+        logging.error(str(e))
+        return 2
+    finally:
+        if stream_in is not sys.stdin:
+            stream_in.close()
+        if stream_out is not sys.stdout:
+            stream_out.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
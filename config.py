@@ -3,4 +3,26 @@ CONFIG = {
     'START_DATE': '2023-01-01',
     'END_DATE': '2024-01-01',
     'RISK_FREE_RATE': 0.05,  # 5%
+    'PRICING_MODEL': 'black_scholes',  # or 'lattice' for American exercise and discrete dividends
+    'LATTICE_METHOD': 'binomial',  # or 'trinomial'
+    'LATTICE_STEPS': 100,  # Steps per contract; Richardson extrapolation also runs a tree with half as many
+    'DIVIDENDS': [],  # Expected (years from today, amount) cash dividends, used by the lattice model
+    'PRICING_PRECISION': 'exact',  # 'exact' (scipy normal CDF) or 'fast' (NumPy table, max CDF error ~3e-8)
+    'VOLATILITY_SOURCE': 'surface',  # 'surface' (implied vol surface) or 'historical'
+    'VOLATILITY_ESTIMATOR': 'close_to_close',  # or 'ewma', 'parkinson', 'garman_klass', 'yang_zhang'
+    'VOLATILITY_WINDOW': 252,  # Trading days in the rolling window
+    'CACHE_DIR': 'market_data_cache',
+    'CACHE_TTL_SECONDS': 24 * 60 * 60,
+    'CACHE_MAX_BYTES': 500 * 1024 ** 2,
+    'OFFLINE': False,  # Replay from CACHE_DIR only, never touch the network
+    'LOG_LEVEL': 'INFO',  # DEBUG logs per-contract pricing detail and slows runs down
+    'METRICS_PATH': 'pipeline_metrics.json',  # Per-stage timing record, None to disable
+    'PROFILE_PATH': None,  # e.g. 'pipeline.prof' to run the stages under cProfile
+    'RENDER_PLOTS': True,  # False for headless pricing runs
+    'PLOT_WORKERS': None,  # Rendering processes, None for one per CPU, 0 to render inline
+    'SERVICE_HOST': '127.0.0.1',  # pricing_service.py binds to localhost only
+    'SERVICE_PORT': 8765,
+    'SERVICE_MAX_BATCH_SIZE': 4096,  # Contracts per coalesced kernel call
+    'SERVICE_MAX_WAIT_MS': 2.0,  # How long a batch waits for more requests to join
+    'SERVICE_CACHE_SIZE': 100_000,  # Recent per-contract results kept in the LRU cache
 }
\ No newline at end of file
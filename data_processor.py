@@ -1,35 +1,114 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timezone
 import logging
-from utils import retry_on_exception
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils import retry_on_exception, RateLimiter
+from volatility import VolatilityEstimator, ESTIMATORS
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, cache=None, offline=False, requests_per_second=5, burst=5,
+                 volatility_estimator='close_to_close', volatility_window=252):
+        """cache is an optional MarketDataCache; offline=True replays from it without network access.
+
+        All downloads go to the Yahoo Finance host and share one rate limiter
+        of requests_per_second, so concurrent fetches stay within its limits.
+        volatility_estimator picks which of the volatility.ESTIMATORS fills the
+        'Volatility' column in preprocess_data.
+        """
         self.logger = logging.getLogger(__name__)
+        if offline and cache is None:
+            raise ValueError("Offline mode requires a market data cache")
+        if volatility_estimator not in ESTIMATORS:
+            raise ValueError(f"volatility_estimator must be one of {ESTIMATORS}")
+        self.volatility_estimator = volatility_estimator
+        self.volatility = VolatilityEstimator(window=volatility_window)
+        self.cache = cache
+        self.offline = offline
+        self.rate_limiter = RateLimiter(requests_per_second, burst)
 
-    @retry_on_exception(max_attempts=3, delay=1)
     def fetch_stock_data(self, ticker, start_date, end_date):
-        """Fetch stock data from Yahoo Finance."""
-        self.logger.info(f"Fetching stock data for {ticker} from {start_date} to {end_date}")
-        return yf.download(ticker, start=start_date, end=end_date)
+        """Fetch stock data, from the cache when one is configured."""
+        if self.cache is None:
+            return self._download_stock_data(ticker, start_date, end_date)
+        fetch = None if self.offline else self._download_stock_data
+        return self.cache.get_history(ticker, start_date, end_date, fetch)
 
-    @retry_on_exception(max_attempts=3, delay=1)
     def fetch_option_data(self, ticker, expiration_date=None):
         """Fetch option chain data for a given expiration date or the next available one."""
-        stock = yf.Ticker(ticker)
-        
         if expiration_date is None:
             # Get the next available expiration date
-            expiration_dates = stock.options
+            expiration_dates = self.fetch_expirations(ticker)
             if not expiration_dates:
                 raise ValueError("No option data available for this ticker.")
             expiration_date = expiration_dates[0]
-        
+
+        if self.cache is None:
+            calls, puts = self._download_option_chain(ticker, expiration_date)
+        else:
+            calls, puts = self.cache.get_option_chain(ticker, expiration_date,
+                                                      None if self.offline else self._download_option_chain)
+        return calls, puts, expiration_date
+
+    def fetch_expirations(self, ticker):
+        """Fetch the available option expiration dates, from the cache when one is configured."""
+        if self.cache is None:
+            return self._download_expirations(ticker)
+        return self.cache.get_expirations(ticker, None if self.offline else self._download_expirations)
+
+    def fetch_option_chains(self, tickers, max_workers=8):
+        """Fetch every expiration's option chain for many tickers concurrently.
+
+        Expiration lists and chains are fetched on a bounded thread pool and
+        yielded as (ticker, expiration_date, calls, puts) as soon as each chain
+        arrives. Failed fetches are logged and skipped so one bad ticker does not
+        abort the whole refresh.
+        """
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            pending = {executor.submit(self.fetch_expirations, ticker): (ticker, None) for ticker in tickers}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ticker, expiration_date = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        what = f"{ticker} {expiration_date}" if expiration_date else f"{ticker} expirations"
+                        self.logger.error(f"Failed to fetch {what}: {str(e)}")
+                        continue
+                    if expiration_date is None:
+                        for expiration in result:
+                            pending[executor.submit(self.fetch_option_data, ticker, expiration)] = (ticker, expiration)
+                    else:
+                        calls, puts, _ = result
+                        yield ticker, expiration_date, calls, puts
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @retry_on_exception(max_attempts=3, delay=1)
+    def _download_stock_data(self, ticker, start_date, end_date):
+        """Fetch stock data from Yahoo Finance."""
+        import yfinance as yf
+        self.rate_limiter.acquire()
+        self.logger.info(f"Fetching stock data for {ticker} from {start_date} to {end_date}")
+        return yf.download(ticker, start=start_date, end=end_date)
+
+    @retry_on_exception(max_attempts=3, delay=1)
+    def _download_expirations(self, ticker):
+        """Fetch the available option expiration dates from Yahoo Finance."""
+        import yfinance as yf
+        self.rate_limiter.acquire()
+        return list(yf.Ticker(ticker).options)
+
+    @retry_on_exception(max_attempts=3, delay=1)
+    def _download_option_chain(self, ticker, expiration_date):
+        """Fetch the option chain for one expiration date from Yahoo Finance."""
+        import yfinance as yf
+        self.rate_limiter.acquire()
         self.logger.info(f"Fetching option data for {ticker} with expiration date {expiration_date}")
-        options = stock.option_chain(expiration_date)
-        return options.calls, options.puts, expiration_date
+        options = yf.Ticker(ticker).option_chain(expiration_date)
+        return options.calls, options.puts
 
 
     def preprocess_data(self, stock_data, calls, puts, expiration_date):
@@ -39,14 +118,20 @@ class DataProcessor:
         try:
             # Preprocess stock data
             stock_data['Returns'] = np.log(stock_data['Adj Close'] / stock_data['Adj Close'].shift(1))
-            stock_data['Volatility'] = stock_data['Returns'].rolling(window=252).std() * np.sqrt(252)
+            for name, vol in self.estimate_volatility(stock_data).items():
+                stock_data[f'Volatility_{name}'] = vol
+            estimator = self.volatility_estimator
+            if f'Volatility_{estimator}' not in stock_data.columns:
+                self.logger.warning(f"No OHLC data for the {estimator} estimator. Using close_to_close volatility")
+                estimator = 'close_to_close'
+            stock_data['Volatility'] = stock_data[f'Volatility_{estimator}']
             
             # Handle NaN values in volatility
             if stock_data['Volatility'].isna().all():
                 self.logger.warning("Not enough data to calculate volatility. Using a default value of 0.2")
                 stock_data['Volatility'] = 0.2
             else:
-                stock_data['Volatility'] = stock_data['Volatility'].fillna(method='ffill')
+                stock_data['Volatility'] = stock_data['Volatility'].ffill()
             
             # Debug information for calls and puts
             self.logger.info(f"Calls type: {type(calls)}")
@@ -57,9 +142,8 @@ class DataProcessor:
             self.logger.info(f"Puts columns: {puts.columns.tolist() if hasattr(puts, 'columns') else 'N/A'}")
 
             # Combine calls and puts
-            calls['optionType'] = 'call'
-            puts['optionType'] = 'put'
-            options = pd.concat([calls, puts], ignore_index=True)
+            # assign() leaves the caller's calls/puts frames untouched
+            options = pd.concat([calls.assign(optionType='call'), puts.assign(optionType='put')], ignore_index=True)
             
             self.logger.info(f"Successfully combined options. Shape: {options.shape}")
             self.logger.info(f"Combined options columns: {options.columns.tolist()}")
@@ -98,19 +182,36 @@ class DataProcessor:
             self.logger.error(f"Error in data preprocessing: {str(e)}", exc_info=True)
             raise
 
+    def estimate_volatility(self, stock_data):
+        """Annualized rolling volatility estimators for a price history, keyed by estimator name.
+
+        Close-to-close and EWMA use 'Adj Close' returns; the range-based
+        estimators need 'Open', 'High', 'Low' and 'Close' and are skipped when
+        those columns are missing.
+        """
+        adj_close = stock_data['Adj Close'].to_numpy(dtype=float)
+        close_based = self.volatility.estimate(adj_close, adj_close, adj_close, adj_close)
+        vols = {name: close_based[name] for name in ('close_to_close', 'ewma')}
+        if all(col in stock_data.columns for col in ('Open', 'High', 'Low', 'Close')):
+            range_based = self.volatility.estimate(*(stock_data[col].to_numpy(dtype=float)
+                                                     for col in ('Open', 'High', 'Low', 'Close')))
+            vols.update({name: range_based[name] for name in ('parkinson', 'garman_klass', 'yang_zhang')})
+        return vols
+
     def filter_options(self, options, moneyness_range=(0.8, 1.2)):
         """Filter options based on moneyness."""
         try:
-            options['Moneyness'] = options['UnderlyingPrice'] / options['strike']
-            filtered_options = options[(options['Moneyness'] >= moneyness_range[0]) & (options['Moneyness'] <= moneyness_range[1])].copy()
+            moneyness = options['UnderlyingPrice'] / options['strike']
+            in_range = (moneyness >= moneyness_range[0]) & (moneyness <= moneyness_range[1])
+            filtered_options = options[in_range].assign(Moneyness=moneyness[in_range])
             
             if filtered_options.empty:
                 self.logger.warning(f"No options found within moneyness range {moneyness_range}")
-                self.logger.info(f"Moneyness range in data: {options['Moneyness'].min()} to {options['Moneyness'].max()}")
+                self.logger.info(f"Moneyness range in data: {moneyness.min()} to {moneyness.max()}")
                 
                 # Expand the range if no options are found
-                expanded_range = (options['Moneyness'].min(), options['Moneyness'].max())
-                filtered_options = options.copy()
+                expanded_range = (moneyness.min(), moneyness.max())
+                filtered_options = options.assign(Moneyness=moneyness)
                 self.logger.info(f"Expanded moneyness range to {expanded_range}")
             
             return filtered_options
@@ -0,0 +1,67 @@
+import cProfile
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+def current_rss_bytes():
+    """Resident set size of this process, falling back to peak RSS where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+class PipelineMetrics:
+    """Per-stage wall time, memory and counter records for one pipeline run.
+
+    Use stage() as a context manager around each step; the yielded dict can be
+    filled with counters such as 'contracts' and 'nan_count'. When profile_path
+    is set, all stages also run under a single cProfile profiler whose stats
+    are written alongside the metrics.
+    """
+
+    def __init__(self, profile_path=None):
+        self.logger = logging.getLogger(__name__)
+        self.stages = []
+        self.profile_path = profile_path
+        self._profiler = cProfile.Profile() if profile_path else None
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, **counters):
+        record = {'stage': name, **counters}
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        if self._profiler:
+            self._profiler.enable()
+        try:
+            yield record
+        finally:
+            if self._profiler:
+                self._profiler.disable()
+            record['seconds'] = time.perf_counter() - start
+            record['rss_delta_mb'] = (current_rss_bytes() - rss_before) / 1024 ** 2
+            self.stages.append(record)
+            self.logger.info(f"Stage {name} finished in {record['seconds']:.3f}s")
+
+    def to_dict(self):
+        return {
+            'total_seconds': time.perf_counter() - self._started,
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == 'darwin' else 1024),
+            'stages': self.stages,
+        }
+
+    def save(self, path):
+        """Write the metrics record as JSON, plus cProfile stats if profiling is enabled."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=float)
+        self.logger.info(f"Pipeline metrics saved as '{path}'")
+        if self._profiler:
+            self._profiler.dump_stats(self.profile_path)
+            self.logger.info(f"Profile saved as '{self.profile_path}'")
@@ -1,29 +1,42 @@
 import logging
+import numpy as np
 from black_scholes_model import BlackScholesModel
+from lattice_model import LatticeModel
 from data_processor import DataProcessor
+from market_data_cache import MarketDataCache
 from model_evaluator import ModelEvaluator
 from sensitivity_analyzer import SensitivityAnalyzer
+from vol_surface import VolSurface
+from instrumentation import PipelineMetrics
+from report_renderer import ReportRenderer
 from utils import setup_logging
 from config import CONFIG
 from ethical_considerations import ethical_check, log_ethical_considerations
 
 def main():
-    setup_logging()
+    setup_logging(CONFIG['LOG_LEVEL'])
     logger = logging.getLogger(__name__)
+    metrics_record = PipelineMetrics(profile_path=CONFIG['PROFILE_PATH'])
+    renderer = ReportRenderer(enabled=CONFIG['RENDER_PLOTS'], max_workers=CONFIG['PLOT_WORKERS'])
 
     try:
         logger.info("Starting Black-Scholes model analysis")
         
         ethical_check()
         
-        bs_model = BlackScholesModel()
-        data_processor = DataProcessor()
-        model_evaluator = ModelEvaluator()
-        sensitivity_analyzer = SensitivityAnalyzer(bs_model)
+        bs_model = BlackScholesModel(precision=CONFIG['PRICING_PRECISION'])
+        cache = MarketDataCache(CONFIG['CACHE_DIR'], CONFIG['CACHE_TTL_SECONDS'], CONFIG['CACHE_MAX_BYTES'])
+        data_processor = DataProcessor(cache=cache, offline=CONFIG['OFFLINE'],
+                                       volatility_estimator=CONFIG['VOLATILITY_ESTIMATOR'],
+                                       volatility_window=CONFIG['VOLATILITY_WINDOW'])
+        model_evaluator = ModelEvaluator(renderer)
+        sensitivity_analyzer = SensitivityAnalyzer(bs_model, renderer)
 
         # Fetch and preprocess data
-        stock_data = data_processor.fetch_stock_data(CONFIG['TICKER'], CONFIG['START_DATE'], CONFIG['END_DATE'])
-        calls, puts, expiration_date = data_processor.fetch_option_data(CONFIG['TICKER'])
+        with metrics_record.stage('fetch') as stage:
+            stock_data = data_processor.fetch_stock_data(CONFIG['TICKER'], CONFIG['START_DATE'], CONFIG['END_DATE'])
+            calls, puts, expiration_date = data_processor.fetch_option_data(CONFIG['TICKER'])
+            stage['contracts'] = len(calls) + len(puts)
         
         logger.info(f"Calls data shape: {calls.shape}")
         logger.info(f"Puts data shape: {puts.shape}")
@@ -34,7 +47,10 @@ def main():
             logger.error("No options data available. Exiting.")
             return
         
-        stock_data, options = data_processor.preprocess_data(stock_data, calls, puts, expiration_date)
+        with metrics_record.stage('preprocess') as stage:
+            stock_data, options = data_processor.preprocess_data(stock_data, calls, puts, expiration_date)
+            stage['contracts'] = len(options)
+            stage['nan_count'] = int(options['ImpliedVolatility'].isna().sum())
 
         # Log more information about the data
         logger.info(f"Number of options before filtering: {len(options)}")
@@ -49,7 +65,9 @@ def main():
         logger.info(f"Stock price: {S:.2f}, Risk-free rate: {r:.2f}, Volatility: {sigma:.2f}")
 
         # Filter options
-        filtered_options = data_processor.filter_options(options)
+        with metrics_record.stage('filter') as stage:
+            filtered_options = data_processor.filter_options(options)
+            stage['contracts'] = len(filtered_options)
         
         logger.info(f"Number of options after filtering: {len(filtered_options)}")
 
@@ -57,21 +75,34 @@ def main():
             logger.warning("No valid options data after filtering. Check your data and parameters.")
             return
             
-        # Calculate model prices
-        filtered_options['ModelPrice'] = filtered_options.apply(
-            lambda row: bs_model.call_price(S, row['strike'], row['TimeToExpiration'], r, sigma) 
-            if row['optionType'] == 'call' 
-            else bs_model.put_price(S, row['strike'], row['TimeToExpiration'], r, sigma),
-            axis=1
-        )
+        with metrics_record.stage('price') as stage:
+            # Per-contract volatility from the implied vol surface, falling back to historical
+            filtered_options['ModelVolatility'] = sigma
+            if CONFIG['VOLATILITY_SOURCE'] == 'surface':
+                try:
+                    vol_surface = VolSurface.from_options(options, spot=S)
+                    filtered_options['ModelVolatility'] = vol_surface.sigma(
+                        filtered_options['strike'], filtered_options['TimeToExpiration']
+                    )
+                except ValueError as e:
+                    logger.warning(f"Could not build volatility surface, using historical volatility: {str(e)}")
+
+            # Calculate model prices
+            pricing_args = (S, filtered_options['strike'], filtered_options['TimeToExpiration'], r,
+                            filtered_options['ModelVolatility'], filtered_options['optionType'])
+            if CONFIG['PRICING_MODEL'] == 'lattice':
+                lattice_model = LatticeModel(steps=CONFIG['LATTICE_STEPS'], method=CONFIG['LATTICE_METHOD'],
+                                             precision=CONFIG['PRICING_PRECISION'])
+                filtered_options['ModelPrice'] = lattice_model.price_batch(*pricing_args, dividends=CONFIG['DIVIDENDS'])
+            else:
+                filtered_options['ModelPrice'] = bs_model.price_batch(*pricing_args)
+            stage['contracts'] = len(filtered_options)
+            stage['nan_count'] = int(filtered_options['ModelPrice'].isna().sum())
 
         # Log some information about the calculated prices
         logger.info(f"Model price statistics: {filtered_options['ModelPrice'].describe()}")
         logger.info(f"Number of NaN model prices: {filtered_options['ModelPrice'].isna().sum()}")
 
-        # Remove rows with NaN model prices
-        valid_options = filtered_options.dropna(subset=['ModelPrice'])
-
         # Remove rows with NaN model prices
         valid_options = filtered_options.dropna(subset=['ModelPrice'])
         
@@ -84,21 +115,43 @@ def main():
         # Evaluate model
         market_prices = valid_options['lastPrice']
         model_prices = valid_options['ModelPrice']
-        metrics = model_evaluator.calculate_metrics(market_prices, model_prices)
+        with metrics_record.stage('evaluate', contracts=len(valid_options)):
+            metrics = model_evaluator.calculate_metrics(market_prices, model_prices)
+            grouped_metrics = model_evaluator.accumulate(valid_options).grouped()
         logger.info(f"Model Evaluation Metrics: {metrics}")
-
-
-        # Plot results
-        model_evaluator.plot_predicted_vs_actual(market_prices, model_prices)
-
-        # Analyze model performance across different strikes and expiration dates
-        model_evaluator.analyze_performance_by_strike(filtered_options)
-        model_evaluator.analyze_performance_by_expiration(filtered_options)
-
-        # Sensitivity analysis
-        for option in filtered_options.iloc[:5].itertuples():  # Analyze first 5 options
-            sensitivity_analyzer.parameter_sensitivity('S', S, 0.2, 100, K=option.strike, T=option.TimeToExpiration, r=r, sigma=sigma)
-            sensitivity_analyzer.plot_greeks(S, option.strike, option.TimeToExpiration, r, sigma)
+        logger.info(f"Model Evaluation Metrics by moneyness, expiry and option type:\n{grouped_metrics.to_string()}")
+
+
+        if renderer.enabled:
+            with metrics_record.stage('plot', contracts=len(filtered_options)):
+                # Plot results
+                model_evaluator.plot_predicted_vs_actual(market_prices, model_prices)
+
+                # Analyze model performance across different strikes and expiration dates
+                model_evaluator.analyze_performance_by_strike(filtered_options)
+                model_evaluator.analyze_performance_by_expiration(filtered_options)
+
+            # Sensitivity analysis
+            with metrics_record.stage('sensitivity') as stage:
+                for option in filtered_options.iloc[:5].itertuples():  # Analyze first 5 options
+                    name = getattr(option, 'contractSymbol', option.Index)
+                    sensitivity_analyzer.parameter_sensitivity('S', S, 0.2, 100, output_name=f'sensitivity_S_{name}.png',
+                                                               option_type=option.optionType, K=option.strike,
+                                                               T=option.TimeToExpiration, r=r, sigma=option.ModelVolatility)
+                    sensitivity_analyzer.plot_greeks(S, option.strike, option.TimeToExpiration, r, option.ModelVolatility,
+                                                     option.optionType, output_name=f'greeks_{name}.png')
+
+                # Portfolio P&L over spot and vol shocks for the whole filtered chain
+                cube = sensitivity_analyzer.engine.scenario_cube(
+                    S, filtered_options['strike'], filtered_options['TimeToExpiration'], r,
+                    filtered_options['ModelVolatility'], filtered_options['optionType'],
+                    spot_shocks=np.linspace(-0.2, 0.2, 41), vol_shocks=[-0.05, 0.0, 0.05]
+                )
+                sensitivity_analyzer.plot_scenario_pnl(cube)
+                stage['contracts'] = len(filtered_options)
+
+            with metrics_record.stage('render') as stage:
+                stage['plots'] = len(renderer.wait())
 
         log_ethical_considerations()
 
@@ -107,5 +160,10 @@ def main():
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}", exc_info=True)
 
+    finally:
+        renderer.close()
+        if CONFIG['METRICS_PATH']:
+            metrics_record.save(CONFIG['METRICS_PATH'])
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+import logging
+import pandas as pd
+
+class CacheMissError(LookupError):
+    """Raised when data is not cached and fetching is not allowed (offline replay)."""
+
+class MarketDataCache:
+    """On-disk Parquet cache for price histories and option chains.
+
+    Entries are tracked in a JSON index keyed by ticker/date range/expiration,
+    with a TTL on freshness and least-recently-used eviction once the cache
+    exceeds max_size_bytes. Price histories are stored as one contiguous frame
+    per ticker so that overlapping date-range requests only fetch the missing
+    head or tail. The index is guarded by a lock so one cache can be shared by
+    concurrent fetch threads.
+    """
+
+    INDEX_FILE = 'index.json'
+    # Days before the cached end refetched when a history entry is past its TTL, so
+    # revised or partial recent bars are replaced without refetching the whole range
+    HISTORY_REFRESH_OVERLAP_DAYS = 5
+
+    def __init__(self, cache_dir, ttl_seconds=86400, max_size_bytes=500 * 1024 ** 2):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, self.INDEX_FILE)
+        self._lock = threading.RLock()
+        self._index = self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            return {}
+        try:
+            with open(self._index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Discarding unreadable cache index: {str(e)}")
+            return {}
+
+    def _save_index(self):
+        tmp_path = self._index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f, indent=1)
+        os.replace(tmp_path, self._index_path)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.parquet')
+
+    def _is_fresh(self, entry):
+        return time.time() - entry['fetched_at'] <= self.ttl_seconds
+
+    def _read(self, key):
+        with self._lock:
+            self._index[key]['last_access'] = time.time()
+            self._save_index()
+        return pd.read_parquet(self._path(key))
+
+    def _write(self, key, frame, **metadata):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        frame.to_parquet(path)
+        now = time.time()
+        with self._lock:
+            self._index[key] = {'fetched_at': now, 'last_access': now, 'size': os.path.getsize(path), **metadata}
+            self._evict()
+            self._save_index()
+
+    def _remove(self, key):
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until under the size limit.
+
+        Price histories never expire: past bars don't go stale, get_history only
+        refreshes their tail, and offline replay depends on them.
+        """
+        expired = [k for k, entry in self._index.items()
+                   if not k.startswith('history/') and not self._is_fresh(entry)]
+        for key in expired:
+            self._remove(key)
+        total = sum(entry['size'] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]['last_access']):
+            if total <= self.max_size_bytes:
+                break
+            total -= self._index[key]['size']
+            self.logger.info(f"Evicting cache entry {key}")
+            self._remove(key)
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._save_index()
+
+    def history_range(self, ticker):
+        """(start, end) Timestamps covered by the cached history for ticker, or None."""
+        entry = self._index.get(f"history/{ticker}")
+        if entry is None:
+            return None
+        return pd.Timestamp(entry['start']), pd.Timestamp(entry['end'])
+
+    def get_history(self, ticker, start_date, end_date, fetch=None):
+        """Return price history for [start_date, end_date), fetching only uncached ranges.
+
+        fetch(ticker, start, end) is called for the missing head and/or tail of
+        the cached range. A history past its TTL keeps its cached bars and only
+        refetches the last few days before the cached end. When fetch is None
+        (offline replay) the cache is used regardless of TTL and CacheMissError
+        is raised if the range is not covered.
+        """
+        key = f"history/{ticker}"
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        entry = self._index.get(key)
+
+        if entry is None:
+            if fetch is None:
+                raise CacheMissError(f"No cached history for {ticker}")
+            history = fetch(ticker, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+            self._write(key, history, start=start.isoformat(), end=end.isoformat())
+            return history
+
+        cached_start, cached_end = pd.Timestamp(entry['start']), pd.Timestamp(entry['end'])
+        missing = []
+        # The fetched ranges always join up with the cached one, so coverage stays contiguous
+        if start < cached_start:
+            missing.append((start, cached_start))
+        if end > cached_end:
+            missing.append((cached_end, end))
+        if fetch is not None and not self._is_fresh(entry):
+            # Replace the most recent bars, which may have been partial or revised when cached
+            refresh_start = max(cached_start, cached_end - pd.Timedelta(days=self.HISTORY_REFRESH_OVERLAP_DAYS))
+            if end > cached_end:
+                missing[-1] = (refresh_start, end)
+            else:
+                missing.append((refresh_start, cached_end))
+
+        history = self._read(key)
+        if missing:
+            if fetch is None:
+                raise CacheMissError(f"Cached history for {ticker} covers {cached_start.date()} to "
+                                     f"{cached_end.date()}, not {start.date()} to {end.date()}")
+            self.logger.info(f"Fetching {len(missing)} missing history range(s) for {ticker}")
+            parts = [fetch(ticker, s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d')) for s, e in missing]
+            history = pd.concat([history, *parts])
+            history = history[~history.index.duplicated(keep='last')].sort_index()
+            self._write(key, history, start=min(start, cached_start).isoformat(),
+                        end=max(end, cached_end).isoformat())
+        else:
+            self.logger.info(f"Serving history for {ticker} from cache")
+
+        return history[(history.index >= start) & (history.index < end)]
+
+    def get_expirations(self, ticker, fetch=None):
+        """Return the list of option expirations for a ticker."""
+        key = f"options/{ticker}/expirations"
+        entry = self._index.get(key)
+        if entry is not None and (fetch is None or self._is_fresh(entry)):
+            return self._read(key)['expiration'].tolist()
+        if fetch is None:
+            raise CacheMissError(f"No cached option expirations for {ticker}")
+        expirations = list(fetch(ticker))
+        self._write(key, pd.DataFrame({'expiration': expirations}))
+        return expirations
+
+    def get_option_chain(self, ticker, expiration_date, fetch=None):
+        """Return (calls, puts) for a ticker and expiration, fetching on a miss or stale entry."""
+        keys = [f"options/{ticker}/{expiration_date}/{side}" for side in ('calls', 'puts')]
+        entries = [self._index.get(key) for key in keys]
+        if all(e is not None and (fetch is None or self._is_fresh(e)) for e in entries):
+            self.logger.info(f"Serving option chain for {ticker} {expiration_date} from cache")
+            return tuple(self._read(key) for key in keys)
+        if fetch is None:
+            raise CacheMissError(f"No cached option chain for {ticker} {expiration_date}")
+        calls, puts = fetch(ticker, expiration_date)
+        for key, frame in zip(keys, (calls, puts)):
+            self._write(key, frame, expiration=expiration_date)
+        return calls, puts
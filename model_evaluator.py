@@ -1,14 +1,129 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import logging
+from report_renderer import ReportRenderer
+
+STAT_FIELDS = ('count', 'mean_true', 'm2_true', 'sse', 'sae', 'ape_sum', 'ape_count')
+
+def _group_stats(group_ids, n_groups, y_true, error):
+    """Per-group sufficient statistics for one chunk, computed with bincount reductions."""
+    count = np.bincount(group_ids, minlength=n_groups).astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_true = np.where(count > 0, np.bincount(group_ids, y_true, n_groups) / count, 0.0)
+        has_ape = y_true != 0
+        ape = np.abs(error[has_ape] / y_true[has_ape])
+    return {
+        'count': count,
+        'mean_true': mean_true,
+        'm2_true': np.bincount(group_ids, (y_true - mean_true[group_ids]) ** 2, n_groups),
+        'sse': np.bincount(group_ids, error ** 2, n_groups),
+        'sae': np.bincount(group_ids, np.abs(error), n_groups),
+        'ape_sum': np.bincount(group_ids[has_ape], ape, n_groups),
+        'ape_count': np.bincount(group_ids[has_ape], minlength=n_groups).astype(float),
+    }
+
+def _merge_stats(a, b):
+    """Combine two sets of group statistics (Chan et al. parallel variance update)."""
+    count = a['count'] + b['count']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = b['mean_true'] - a['mean_true']
+        weight = np.where(count > 0, b['count'] / count, 0.0)
+        mean_true = a['mean_true'] + delta * weight
+        m2_true = a['m2_true'] + b['m2_true'] + delta ** 2 * a['count'] * weight
+    merged = {name: a[name] + b[name] for name in ('sse', 'sae', 'ape_sum', 'ape_count')}
+    return {'count': count, 'mean_true': mean_true, 'm2_true': m2_true, **merged}
+
+def _metrics_from_stats(stats):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n = stats['count']
+        mse = stats['sse'] / n
+        return {
+            'count': n,
+            'MAE': stats['sae'] / n,
+            'MSE': mse,
+            'RMSE': np.sqrt(mse),
+            'R2': 1 - stats['sse'] / stats['m2_true'],
+            'MAPE': stats['ape_sum'] / stats['ape_count'],
+        }
+
+class MetricsAccumulator:
+    """Online MAE/MSE/RMSE/R2/MAPE that can be updated chunk by chunk and merged across workers.
+
+    Only per-group sufficient statistics are kept (counts, sums of absolute and
+    squared errors, and a Welford-style running mean and M2 of the market
+    prices for R2), so memory does not grow with the number of pairs seen.
+    Besides the overall metrics it keeps breakdowns by moneyness bucket,
+    expiry bucket and option type; the bucket edges are fixed at construction
+    so accumulators built with the same edges can be merged.
+    """
+
+    def __init__(self, moneyness_edges=(0.8, 0.9, 0.95, 1.0, 1.05, 1.1, 1.2),
+                 expiry_edges=(7 / 365, 30 / 365, 90 / 365, 180 / 365, 1.0)):
+        self.edges = {'moneyness': np.asarray(moneyness_edges, dtype=float),
+                      'expiry': np.asarray(expiry_edges, dtype=float)}
+        sizes = {'all': 1, 'moneyness': len(moneyness_edges) + 1, 'expiry': len(expiry_edges) + 1, 'option_type': 2}
+        self.stats = {dim: {name: np.zeros(size) for name in STAT_FIELDS} for dim, size in sizes.items()}
+
+    def update(self, y_true, y_pred, moneyness=None, expiry=None, is_call=None):
+        """Add one chunk of market/model price pairs; NaN pairs are ignored.
+
+        A breakdown is only updated for chunks that supply its key, so its
+        counts cover just those chunks.
+        """
+        y_true = np.asarray(y_true, dtype=float).ravel()
+        y_pred = np.asarray(y_pred, dtype=float).ravel()
+        valid = np.isfinite(y_true) & np.isfinite(y_pred)
+        y_true, error = y_true[valid], (y_pred - y_true)[valid]
+
+        keys = {'all': np.zeros(y_true.size, dtype=int)}
+        if moneyness is not None:
+            keys['moneyness'] = np.digitize(np.asarray(moneyness, dtype=float).ravel()[valid], self.edges['moneyness'])
+        if expiry is not None:
+            keys['expiry'] = np.digitize(np.asarray(expiry, dtype=float).ravel()[valid], self.edges['expiry'])
+        if is_call is not None:
+            # Group 0 is calls, group 1 puts
+            keys['option_type'] = (~np.asarray(is_call, dtype=bool).ravel()[valid]).astype(int)
+
+        for dim, group_ids in keys.items():
+            chunk = _group_stats(group_ids, self.stats[dim]['count'].size, y_true, error)
+            self.stats[dim] = _merge_stats(self.stats[dim], chunk)
+        return self
+
+    def merge(self, other):
+        """Fold another accumulator (e.g. from a worker process) into this one."""
+        if any(not np.array_equal(self.edges[k], other.edges[k]) for k in self.edges):
+            raise ValueError("Cannot merge accumulators with different bucket edges")
+        self.stats = {dim: _merge_stats(self.stats[dim], other.stats[dim]) for dim in self.stats}
+        return self
+
+    def result(self):
+        """Overall metrics as a dict of floats."""
+        return {name: float(values[0]) for name, values in _metrics_from_stats(self.stats['all']).items()}
+
+    def _labels(self, dim):
+        if dim == 'option_type':
+            return ['call', 'put']
+        bounds = [-np.inf, *self.edges[dim], np.inf]
+        return [f"[{lo:.4g}, {hi:.4g})" for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+    def grouped(self):
+        """Metrics per moneyness bucket, expiry bucket and option type as a DataFrame."""
+        import pandas as pd
+        frames = []
+        for dim in ('moneyness', 'expiry', 'option_type'):
+            metrics = _metrics_from_stats(self.stats[dim])
+            frame = pd.DataFrame({'dimension': dim, 'bucket': self._labels(dim), **metrics})
+            frames.append(frame[frame['count'] > 0])
+        return pd.concat(frames, ignore_index=True)
 
 class ModelEvaluator:
-    def __init__(self):
+    def __init__(self, renderer=None):
         self.logger = logging.getLogger(__name__)
+        self.renderer = renderer if renderer is not None else ReportRenderer(max_workers=0)
 
     def calculate_metrics(self, y_true, y_pred):
         """Calculate evaluation metrics for the model."""
+        # scikit-learn is only needed here, so it is not loaded at import time
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
         mae = mean_absolute_error(y_true, y_pred)
         mse = mean_squared_error(y_true, y_pred)
         rmse = np.sqrt(mse)
@@ -20,40 +135,61 @@ class ModelEvaluator:
 
     def plot_predicted_vs_actual(self, y_true, y_pred):
         """Plot predicted vs actual option prices."""
-        plt.figure(figsize=(10, 6))
-        plt.scatter(y_true, y_pred, alpha=0.5)
-        plt.plot([min(y_true), max(y_true)], [min(y_true), max(y_true)], 'r--', lw=2)
-        plt.xlabel('Market Price')
-        plt.ylabel('Model Price')
-        plt.title('Predicted vs Actual Option Prices')
-        plt.savefig('predicted_vs_actual.png')
-        plt.close()
+        y_true = np.asarray(y_true)
+        y_pred = np.asarray(y_pred)
+        bounds = [y_true.min(), y_true.max()]
+        self.renderer.submit({
+            'filename': 'predicted_vs_actual.png',
+            'figsize': (10, 6),
+            'panels': [{'title': 'Predicted vs Actual Option Prices', 'xlabel': 'Market Price', 'ylabel': 'Model Price',
+                        'series': [{'kind': 'scatter', 'x': y_true, 'y': y_pred, 'alpha': 0.5},
+                                   {'kind': 'line', 'x': bounds, 'y': bounds, 'style': 'r--', 'lw': 2}]}],
+        })
         
-        self.logger.info("Predicted vs Actual plot saved as 'predicted_vs_actual.png'")
+        self.logger.info("Predicted vs Actual plot queued as 'predicted_vs_actual.png'")
+
+    def accumulate(self, options, accumulator=None):
+        """Add a priced options chunk to a MetricsAccumulator, creating one if needed."""
+        accumulator = accumulator if accumulator is not None else MetricsAccumulator()
+        return accumulator.update(options['lastPrice'], options['ModelPrice'],
+                                  moneyness=options['UnderlyingPrice'] / options['strike'],
+                                  expiry=options['TimeToExpiration'],
+                                  is_call=options['optionType'] == 'call')
+
+    def percentage_error_table(self, options):
+        """Per-contract model vs market differences that the performance plots are drawn from."""
+        table = options[['strike', 'TimeToExpiration', 'optionType', 'lastPrice', 'ModelPrice']].copy()
+        table['PriceDiff'] = table['ModelPrice'] - table['lastPrice']
+        table['PriceDiffPct'] = table['PriceDiff'] / table['lastPrice']
+        return table
 
     def analyze_performance_by_strike(self, options):
         """Analyze model performance across different strike prices."""
-        options['PriceDiff'] = options['ModelPrice'] - options['lastPrice']
-        options['PriceDiffPct'] = options['PriceDiff'] / options['lastPrice']
+        table = self.percentage_error_table(options)
+        options['PriceDiff'] = table['PriceDiff']
+        options['PriceDiffPct'] = table['PriceDiffPct']
 
-        plt.figure(figsize=(10, 6))
-        plt.scatter(options['strike'], options['PriceDiffPct'])
-        plt.xlabel('Strike Price')
-        plt.ylabel('Price Difference (%)')
-        plt.title('Model Performance Across Strike Prices')
-        plt.savefig('performance_by_strike.png')
-        plt.close()
+        self.renderer.submit({
+            'filename': 'performance_by_strike.png',
+            'figsize': (10, 6),
+            'panels': [{'title': 'Model Performance Across Strike Prices', 'xlabel': 'Strike Price',
+                        'ylabel': 'Price Difference (%)',
+                        'series': [{'kind': 'scatter', 'x': options['strike'].to_numpy(),
+                                    'y': options['PriceDiffPct'].to_numpy()}]}],
+        })
 
-        self.logger.info("Performance by strike plot saved as 'performance_by_strike.png'")
+        self.logger.info("Performance by strike plot queued as 'performance_by_strike.png'")
+        return table
 
     def analyze_performance_by_expiration(self, options):
         """Analyze model performance across different expiration dates."""
-        plt.figure(figsize=(10, 6))
-        plt.scatter(options['TimeToExpiration'], options['PriceDiffPct'])
-        plt.xlabel('Time to Expiration (Years)')
-        plt.ylabel('Price Difference (%)')
-        plt.title('Model Performance Across Expiration Dates')
-        plt.savefig('performance_by_expiration.png')
-        plt.close()
-
-        self.logger.info("Performance by expiration plot saved as 'performance_by_expiration.png'")
\ No newline at end of file
+        self.renderer.submit({
+            'filename': 'performance_by_expiration.png',
+            'figsize': (10, 6),
+            'panels': [{'title': 'Model Performance Across Expiration Dates', 'xlabel': 'Time to Expiration (Years)',
+                        'ylabel': 'Price Difference (%)',
+                        'series': [{'kind': 'scatter', 'x': options['TimeToExpiration'].to_numpy(),
+                                    'y': options['PriceDiffPct'].to_numpy()}]}],
+        })
+
+        self.logger.info("Performance by expiration plot queued as 'performance_by_expiration.png'")
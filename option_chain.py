@@ -0,0 +1,125 @@
+import json
+import os
+import numpy as np
+import logging
+
+class OptionChain:
+    """Compact columnar option chain built from contiguous typed NumPy arrays.
+
+    Contracts are stored sorted by strike with a boolean is_call column,
+    float64 strike and expiry (time to expiration in years) columns and
+    optional float64 last_price / implied_vol columns. The underlying price is
+    a shared scalar rather than a broadcast column. Because strikes are sorted,
+    strike and moneyness filters are contiguous slices and return zero-copy
+    views. Chains can be saved as one .npy file per column and loaded back
+    memory-mapped, so very large historical chains need not fit in RAM.
+    """
+
+    COLUMNS = {'is_call': np.bool_, 'strike': np.float64, 'expiry': np.float64,
+               'last_price': np.float64, 'implied_vol': np.float64}
+    META_FILE = 'meta.json'
+
+    def __init__(self, underlying_price, is_call, strike, expiry, last_price=None, implied_vol=None,
+                 metadata=None, _sorted=False):
+        self.logger = logging.getLogger(__name__)
+        self.underlying_price = float(underlying_price)
+        self.metadata = dict(metadata or {})
+        columns = {'is_call': is_call, 'strike': strike, 'expiry': expiry,
+                   'last_price': last_price, 'implied_vol': implied_vol}
+        columns = {name: np.asarray(values, dtype=self.COLUMNS[name])
+                   for name, values in columns.items() if values is not None}
+        if len({values.shape for values in columns.values()}) != 1:
+            raise ValueError("All option chain columns must have the same length")
+        if not _sorted:
+            order = np.argsort(columns['strike'], kind='stable')
+            columns = {name: np.ascontiguousarray(values[order]) for name, values in columns.items()}
+        self._columns = columns
+
+    @classmethod
+    def from_frame(cls, options, underlying_price=None, metadata=None):
+        """Build a chain from a preprocessed options DataFrame without copying it more than once."""
+        if underlying_price is None:
+            underlying_price = options['UnderlyingPrice'].iloc[0]
+        optional = {'last_price': 'lastPrice', 'implied_vol': 'ImpliedVolatility'}
+        return cls(
+            underlying_price,
+            (options['optionType'] == 'call').to_numpy(),
+            options['strike'].to_numpy(),
+            options['TimeToExpiration'].to_numpy(),
+            metadata=metadata,
+            **{name: options[col].to_numpy() for name, col in optional.items() if col in options.columns},
+        )
+
+    def to_frame(self):
+        """Convert back to the preprocessed DataFrame layout used by the rest of the pipeline."""
+        import pandas as pd
+        frame = pd.DataFrame({
+            'strike': self.strike,
+            'optionType': np.where(self.is_call, 'call', 'put'),
+            'TimeToExpiration': self.expiry,
+            'UnderlyingPrice': self.underlying_price,
+        })
+        if 'last_price' in self._columns:
+            frame['lastPrice'] = self.last_price
+        if 'implied_vol' in self._columns:
+            frame['ImpliedVolatility'] = self.implied_vol
+        return frame
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get('_columns', {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    def __len__(self):
+        return self._columns['strike'].size
+
+    def _view(self, index):
+        return OptionChain(self.underlying_price, metadata=self.metadata, _sorted=True,
+                           **{name: values[index] for name, values in self._columns.items()})
+
+    def __getitem__(self, index):
+        """Slices return zero-copy views; boolean masks and index arrays return copies."""
+        return self._view(index)
+
+    def strike_range(self, low, high):
+        """Zero-copy view of contracts with low <= strike <= high."""
+        start = np.searchsorted(self.strike, low, side='left')
+        stop = np.searchsorted(self.strike, high, side='right')
+        return self._view(slice(start, stop))
+
+    def filter_moneyness(self, moneyness_range=(0.8, 1.2)):
+        """Zero-copy view of contracts whose moneyness S / K lies within moneyness_range."""
+        low, high = moneyness_range
+        return self.strike_range(self.underlying_price / high, self.underlying_price / low)
+
+    def price(self, model, r, sigma):
+        """Price the chain with a BlackScholesModel; columns are passed to the kernel as-is."""
+        return model.price_batch(self.underlying_price, self.strike, self.expiry, r, sigma, self.is_call)
+
+    def greeks(self, model, r, sigma):
+        return model.greeks(self.underlying_price, self.strike, self.expiry, r, sigma, self.is_call)
+
+    def save(self, directory):
+        """Write one .npy file per column plus a JSON file with the shared scalars."""
+        os.makedirs(directory, exist_ok=True)
+        for name, values in self._columns.items():
+            np.save(os.path.join(directory, f'{name}.npy'), values)
+        with open(os.path.join(directory, self.META_FILE), 'w') as f:
+            json.dump({'underlying_price': self.underlying_price, 'columns': list(self._columns),
+                       'metadata': self.metadata}, f)
+        self.logger.info(f"Saved option chain with {len(self)} contracts to '{directory}'")
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Load a saved chain; by default columns are memory-mapped read-only rather than read into RAM."""
+        with open(os.path.join(directory, cls.META_FILE)) as f:
+            meta = json.load(f)
+        columns = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+                   for name in meta['columns']}
+        chain = cls.__new__(cls)
+        chain.logger = logging.getLogger(__name__)
+        chain.underlying_price = meta['underlying_price']
+        chain.metadata = meta['metadata']
+        chain._columns = columns
+        return chain
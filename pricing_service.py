@@ -0,0 +1,354 @@
+"""Long-running local pricing service with request micro-batching.
+
+Exposes price, greeks and iv endpoints over HTTP on localhost or a Unix
+socket. Requests are JSON objects of columns (S, K, T, r, sigma or price,
+option_type), where scalars are broadcast, for example:
+
+    POST /price  {"S": 190, "K": [180, 190, 200], "T": 0.5, "r": 0.05, "sigma": 0.25}
+
+Concurrent requests to the same endpoint are coalesced into one call of the
+vectorized BlackScholesModel kernel, so many small callers share a single
+pass. Recent per-contract results are kept in an LRU cache, and GET /stats
+reports request latency, throughput, batch sizes and cache hit rates.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict, deque
+import numpy as np
+from black_scholes_model import BlackScholesModel
+from config import CONFIG
+
+# Input columns and result fields for each endpoint
+ENDPOINTS = {
+    'price': (('S', 'K', 'T', 'r', 'sigma'), ('price',)),
+    'greeks': (('S', 'K', 'T', 'r', 'sigma'), ('delta', 'gamma', 'vega', 'theta', 'rho')),
+    'iv': (('price', 'S', 'K', 'T', 'r'), ('implied_vol', 'converged', 'iterations')),
+}
+
+class MicroBatcher:
+    """Coalesce concurrent requests into one call of a vectorized kernel.
+
+    The first queued request opens a batch; further requests join it until
+    max_batch_size contracts are collected or max_wait seconds have passed.
+    The kernel takes a dict of 1-D input columns and returns a dict of 1-D
+    result arrays, which are split back per request.
+    """
+
+    def __init__(self, kernel, max_batch_size=4096, max_wait=0.002):
+        self.logger = logging.getLogger(__name__)
+        self.kernel = kernel
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.contracts = 0
+        self._queue = asyncio.Queue()
+
+    async def submit(self, columns):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((columns, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0]['is_call'])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                batch.append(item)
+                size += len(item[0]['is_call'])
+            self._execute(batch, size)
+
+    def _execute(self, batch, size):
+        columns = {name: np.concatenate([item[0][name] for item in batch]) for name in batch[0][0]}
+        try:
+            results = self.kernel(columns)
+        except Exception as e:
+            self.logger.error(f"Batch of {size} contracts failed: {str(e)}", exc_info=True)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.contracts += size
+        offsets = np.cumsum([len(item[0]['is_call']) for item in batch])[:-1]
+        split = {name: np.split(np.broadcast_to(values, (size,)), offsets) for name, values in results.items()}
+        for i, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result({name: parts[i] for name, parts in split.items()})
+
+class ResultCache:
+    """LRU cache of per-contract results keyed by endpoint and inputs."""
+
+    def __init__(self, max_size=100_000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+class PricingService:
+    """Serves the BlackScholesModel kernels to local clients with micro-batching and caching."""
+
+    def __init__(self, model=None, max_batch_size=4096, max_wait=0.002, cache_size=100_000, latency_window=10_000):
+        self.logger = logging.getLogger(__name__)
+        self.model = model or BlackScholesModel()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.cache = ResultCache(cache_size)
+        self.kernels = {
+            'price': lambda c: {'price': self.model.price_batch(c['S'], c['K'], c['T'], c['r'], c['sigma'], c['is_call'])},
+            'greeks': lambda c: self.model.greeks(c['S'], c['K'], c['T'], c['r'], c['sigma'], c['is_call']),
+            'iv': lambda c: self.model.implied_vol(c['price'], c['S'], c['K'], c['T'], c['r'], c['is_call']),
+        }
+        self.batchers = {}
+        self.requests = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=latency_window)
+        self._started = time.monotonic()
+        self._tasks = []
+        self._server = None
+
+    def parse_columns(self, endpoint, payload):
+        """Broadcast a request payload to 1-D input columns plus an is_call column."""
+        inputs, _ = ENDPOINTS[endpoint]
+        missing = [name for name in inputs if name not in payload]
+        if missing:
+            raise ValueError(f"Missing input(s) {missing} for '{endpoint}'")
+        option_type = payload.get('option_type', 'call')
+        if isinstance(option_type, str):
+            option_type = option_type.lower()
+        else:
+            option_type = np.char.lower(np.asarray(option_type, dtype=str))
+        arrays, is_call = self.model._broadcast_inputs([payload[name] for name in inputs], option_type)
+        columns = {name: np.ravel(values) for name, values in zip(inputs, arrays)}
+        columns['is_call'] = np.ravel(is_call)
+        return columns
+
+    async def handle(self, endpoint, payload):
+        """Answer one request from the cache and, for the rest, a shared micro-batch."""
+        columns = self.parse_columns(endpoint, payload)
+        _, fields = ENDPOINTS[endpoint]
+        n = columns['is_call'].size
+        keys = list(zip([endpoint] * n, *(values.tolist() for values in columns.values())))
+        cached = [self.cache.get(key) for key in keys]
+        misses = [i for i, value in enumerate(cached) if value is None]
+
+        if misses:
+            miss_columns = {name: values[misses] for name, values in columns.items()}
+            computed = await self.batchers[endpoint].submit(miss_columns)
+            rows = list(zip(*(computed[field].tolist() for field in fields)))
+            for i, row in zip(misses, rows):
+                cached[i] = row
+                self.cache.put(keys[i], row)
+        return {field: [row[j] for row in cached] for j, field in enumerate(fields)}
+
+    def stats(self):
+        latencies = np.asarray(self._latencies) * 1000
+        uptime = time.monotonic() - self._started
+        batches = sum(b.batches for b in self.batchers.values())
+        contracts = sum(b.contracts for b in self.batchers.values())
+        lookups = self.cache.hits + self.cache.misses
+        return {
+            'uptime_seconds': uptime,
+            'requests': self.requests,
+            'errors': self.errors,
+            'requests_per_second': self.requests / uptime if uptime else 0.0,
+            'batches': batches,
+            'batched_contracts': contracts,
+            'mean_batch_size': contracts / batches if batches else 0.0,
+            'cache_entries': len(self.cache),
+            'cache_hit_rate': self.cache.hits / lookups if lookups else 0.0,
+            'latency_ms': {f'p{q}': float(np.percentile(latencies, q)) if latencies.size else None
+                           for q in (50, 90, 99)},
+        }
+
+    async def _respond(self, method, path, body):
+        endpoint = path.strip('/')
+        if method == 'GET' and endpoint == 'stats':
+            return 200, self.stats()
+        if method != 'POST' or endpoint not in ENDPOINTS:
+            return 404, {'error': f"Unknown endpoint {method} {path}"}
+        start = time.perf_counter()
+        try:
+            result = await self.handle(endpoint, json.loads(body or b'{}'))
+        except (ValueError, TypeError) as e:
+            self.errors += 1
+            return 400, {'error': str(e)}
+        except Exception as e:
+            # Answer instead of dropping the client's keep-alive connection
+            self.logger.error(f"Error handling {endpoint} request: {str(e)}", exc_info=True)
+            self.errors += 1
+            return 500, {'error': str(e)}
+        self.requests += 1
+        self._latencies.append(time.perf_counter() - start)
+        return 200, result
+
+    async def _serve_connection(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive: enough for local clients, not a general web server
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                method, path, _ = request_line.split(' ', 2)
+                headers = {k.strip().lower(): v.strip() for k, v in
+                           (line.split(':', 1) for line in header_lines if ':' in line)}
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                status, result = await self._respond(method, path, body)
+                payload = json.dumps(result).encode()
+                writer.write(f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+                             + payload)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except Exception as e:
+            self.logger.error(f"Connection error: {str(e)}", exc_info=True)
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=8765, unix_socket=None):
+        """Start the batchers and listen on host:port, or on unix_socket when given."""
+        for endpoint, kernel in self.kernels.items():
+            self.batchers[endpoint] = MicroBatcher(kernel, self.max_batch_size, self.max_wait)
+            self._tasks.append(asyncio.create_task(self.batchers[endpoint].run()))
+        if unix_socket:
+            self._server = await asyncio.start_unix_server(self._serve_connection, path=unix_socket)
+            self.logger.info(f"Pricing service listening on {unix_socket}")
+        else:
+            self._server = await asyncio.start_server(self._serve_connection, host, port)
+            self.logger.info(f"Pricing service listening on {host}:{self._server.sockets[0].getsockname()[1]}")
+        return self._server
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def serve_forever(self, host='127.0.0.1', port=8765, unix_socket=None):
+        server = await self.start(host, port, unix_socket)
+        try:
+            await server.serve_forever()
+        finally:
+            await self.stop()
+
+class PricingClient:
+    """Async client for a local PricingService over one keep-alive connection."""
+
+    def __init__(self, host='127.0.0.1', port=8765, unix_socket=None):
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        if self.unix_socket:
+            self._reader, self._writer = await asyncio.open_unix_connection(self.unix_socket)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        return self
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        async with self._lock:
+            self._writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                               f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+            await self._writer.drain()
+            head = await self._reader.readuntil(b'\r\n\r\n')
+            status_line, *header_lines = head.decode('latin-1').split('\r\n')
+            headers = {k.strip().lower(): v.strip() for k, v in
+                       (line.split(':', 1) for line in header_lines if ':' in line)}
+            result = json.loads(await self._reader.readexactly(int(headers['content-length'])))
+        if int(status_line.split(' ')[1]) != 200:
+            raise ValueError(result.get('error', status_line))
+        return result
+
+    async def price(self, S, K, T, r, sigma, option_type='call'):
+        return (await self.request('POST', '/price', {'S': S, 'K': K, 'T': T, 'r': r, 'sigma': sigma,
+                                                      'option_type': option_type}))['price']
+
+    async def greeks(self, S, K, T, r, sigma, option_type='call'):
+        return await self.request('POST', '/greeks', {'S': S, 'K': K, 'T': T, 'r': r, 'sigma': sigma,
+                                                      'option_type': option_type})
+
+    async def implied_vol(self, price, S, K, T, r, option_type='call'):
+        return await self.request('POST', '/iv', {'price': price, 'S': S, 'K': K, 'T': T, 'r': r,
+                                                  'option_type': option_type})
+
+    async def stats(self):
+        return await self.request('GET', '/stats')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Black-Scholes pricing, Greeks and implied volatility locally.")
+    parser.add_argument('--host', default=CONFIG['SERVICE_HOST'])
+    parser.add_argument('--port', type=int, default=CONFIG['SERVICE_PORT'])
+    parser.add_argument('--unix-socket', help="listen on this Unix socket path instead of TCP")
+    parser.add_argument('--max-batch-size', type=int, default=CONFIG['SERVICE_MAX_BATCH_SIZE'])
+    parser.add_argument('--max-wait-ms', type=float, default=CONFIG['SERVICE_MAX_WAIT_MS'])
+    parser.add_argument('--cache-size', type=int, default=CONFIG['SERVICE_CACHE_SIZE'])
+    parser.add_argument('--precision', default=CONFIG['PRICING_PRECISION'], choices=['exact', 'fast'])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    service = PricingService(BlackScholesModel(precision=args.precision), max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000,
+                             cache_size=args.cache_size)
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port, args.unix_socket))
+    except KeyboardInterrupt:
+        logging.info("Pricing service stopped")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
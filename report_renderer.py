@@ -0,0 +1,86 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+def render_plot(job):
+    """Render one plot job to a PNG file and return its path.
+
+    A job is plain data so it can be sent to a worker process:
+    {'filename', 'figsize', 'layout': (rows, cols), 'tight_layout',
+     'panels': [{'title', 'xlabel', 'ylabel', 'grid',
+                 'series': [{'kind': 'line' | 'scatter', 'x', 'y', 'style', 'alpha', 'lw'}]}]}
+    Figures are drawn with the object-oriented API on the Agg canvas, so no
+    global pyplot state is touched.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=job.get('figsize', (10, 6)))
+    rows, cols = job.get('layout', (1, 1))
+    for i, panel in enumerate(job['panels'], start=1):
+        ax = fig.add_subplot(rows, cols, i)
+        for series in panel['series']:
+            if series['kind'] == 'scatter':
+                ax.scatter(series['x'], series['y'], alpha=series.get('alpha'))
+            else:
+                ax.plot(series['x'], series['y'], series.get('style', '-'), lw=series.get('lw'))
+        ax.set_title(panel.get('title', ''))
+        ax.set_xlabel(panel.get('xlabel', ''))
+        ax.set_ylabel(panel.get('ylabel', ''))
+        if panel.get('grid'):
+            ax.grid(True)
+    if job.get('tight_layout'):
+        fig.tight_layout()
+    fig.savefig(job['filename'])
+    return job['filename']
+
+class ReportRenderer:
+    """Queue of plot jobs rendered off the main thread.
+
+    With max_workers > 0 jobs are rendered in a process pool; with
+    max_workers == 0 they are rendered inline as they are submitted. When
+    disabled, jobs are dropped so headless pricing runs pay nothing for plots.
+    """
+
+    def __init__(self, enabled=True, max_workers=None, output_dir='.'):
+        self.logger = logging.getLogger(__name__)
+        self.enabled = enabled
+        self.max_workers = max_workers
+        self.output_dir = output_dir
+        self._executor = None
+        self._pending = []
+
+    def submit(self, job):
+        if not self.enabled:
+            return
+        job = {**job, 'filename': os.path.join(self.output_dir, job['filename'])}
+        if self.max_workers == 0:
+            render_plot(job)
+            self.logger.info(f"Plot saved as '{job['filename']}'")
+            return
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._pending.append(self._executor.submit(render_plot, job))
+
+    def wait(self):
+        """Block until every queued job has been rendered and return the written paths."""
+        paths = []
+        for future in self._pending:
+            try:
+                paths.append(future.result())
+                self.logger.info(f"Plot saved as '{paths[-1]}'")
+            except Exception as e:
+                self.logger.error(f"Plot rendering failed: {str(e)}", exc_info=True)
+        self._pending = []
+        return paths
+
+    def close(self):
+        self.wait()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,56 +1,70 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import logging
+from report_renderer import ReportRenderer
+from scenario_engine import ScenarioEngine
 
 class SensitivityAnalyzer:
-    def __init__(self, model):
+    def __init__(self, model, renderer=None):
         self.model = model
+        self.renderer = renderer if renderer is not None else ReportRenderer(max_workers=0)
+        self.engine = ScenarioEngine(model)
         self.logger = logging.getLogger(__name__)
 
-    def parameter_sensitivity(self, param, base_value, range_pct, steps, **kwargs):
+    def parameter_sensitivity(self, param, base_value, range_pct, steps, output_name=None, option_type='call', **kwargs):
+        """Plot option price against one of S, sigma, r or T, taken from a one-axis scenario cube."""
         param_range = np.linspace(base_value * (1 - range_pct), 
                                   base_value * (1 + range_pct), 
                                   steps)
-        prices = [self.model.call_price(**{**kwargs, param: value}) for value in param_range]
+        params = {**kwargs, param: base_value}
+        shocks = {
+            'S': {'spot_shocks': param_range / base_value - 1},
+            'sigma': {'vol_shocks': param_range - base_value},
+            'r': {'rate_shifts': param_range - base_value},
+            'T': {'time_decays': base_value - param_range},
+        }
+        if param not in shocks:
+            raise ValueError("param must be one of 'S', 'sigma', 'r' or 'T'")
+        cube = self.engine.scenario_cube(params['S'], params['K'], params['T'], params['r'], params['sigma'],
+                                         option_type, **shocks[param])
+        prices = cube['value'].ravel()
         
-        plt.figure(figsize=(10, 6))
-        plt.plot(param_range, prices)
-        plt.title(f'Sensitivity to {param}')
-        plt.xlabel(param)
-        plt.ylabel('Option Price')
-        plt.grid(True)
-        plt.savefig(f'sensitivity_{param}.png')
-        plt.close()
+        filename = output_name or f'sensitivity_{param}.png'
+        self.renderer.submit({
+            'filename': filename,
+            'figsize': (10, 6),
+            'panels': [{'title': f'Sensitivity to {param}', 'xlabel': param, 'ylabel': 'Option Price', 'grid': True,
+                        'series': [{'kind': 'line', 'x': param_range, 'y': prices}]}],
+        })
         
-        self.logger.info(f"Sensitivity analysis for {param} saved as 'sensitivity_{param}.png'")
+        self.logger.info(f"Sensitivity analysis for {param} queued as '{filename}'")
 
-    def plot_greeks(self, S, K, T, r, sigma):
+    def plot_scenario_pnl(self, cube, output_name='scenario_pnl.png'):
+        """Plot portfolio P&L against spot shock, one line per vol shock, at the scenarios closest to no rate or time change."""
+        ir = int(np.argmin(np.abs(cube['rate_shifts'])))
+        it = int(np.argmin(np.abs(cube['time_decays'])))
+        pnl = cube['pnl'][..., ir, it]
+        self.renderer.submit({
+            'filename': output_name,
+            'figsize': (10, 6),
+            'panels': [{'title': 'Scenario P&L', 'xlabel': 'Spot Shock', 'ylabel': 'P&L', 'grid': True,
+                        'series': [{'kind': 'line', 'x': cube['spot_shocks'], 'y': pnl[:, iv]}
+                                   for iv in range(pnl.shape[1])]}],
+        })
+
+        self.logger.info(f"Scenario P&L plot queued as '{output_name}'")
+
+    def plot_greeks(self, S, K, T, r, sigma, option_type='call', output_name='greeks.png'):
         S_range = np.linspace(0.5 * K, 1.5 * K, 100)
         
-        deltas = [self.model.delta(s, K, T, r, sigma) for s in S_range]
-        gammas = [self.model.gamma(s, K, T, r, sigma) for s in S_range]
-        vegas = [self.model.vega(s, K, T, r, sigma) for s in S_range]
-        thetas = [self.model.theta(s, K, T, r, sigma) for s in S_range]
-        rhos = [self.model.rho(s, K, T, r, sigma) for s in S_range]
+        greeks = self.model.greeks(S_range, K, T, r, sigma, option_type)
         
-        plt.figure(figsize=(15, 10))
-        plt.subplot(2, 3, 1)
-        plt.plot(S_range, deltas)
-        plt.title('Delta')
-        plt.subplot(2, 3, 2)
-        plt.plot(S_range, gammas)
-        plt.title('Gamma')
-        plt.subplot(2, 3, 3)
-        plt.plot(S_range, vegas)
-        plt.title('Vega')
-        plt.subplot(2, 3, 4)
-        plt.plot(S_range, thetas)
-        plt.title('Theta')
-        plt.subplot(2, 3, 5)
-        plt.plot(S_range, rhos)
-        plt.title('Rho')
-        plt.tight_layout()
-        plt.savefig('greeks.png')
-        plt.close()
+        self.renderer.submit({
+            'filename': output_name,
+            'figsize': (15, 10),
+            'layout': (2, 3),
+            'tight_layout': True,
+            'panels': [{'title': name.capitalize(), 'series': [{'kind': 'line', 'x': S_range, 'y': greeks[name]}]}
+                       for name in ('delta', 'gamma', 'vega', 'theta', 'rho')],
+        })
         
-        self.logger.info("Greeks plot saved as 'greeks.png'")
\ No newline at end of file
+        self.logger.info(f"Greeks plot queued as '{output_name}'")
@@ -0,0 +1,219 @@
+import numpy as np
+from black_scholes_model import norm_pdf
+import logging
+
+# Neglected higher-order terms of the expansion whose size is tracked per contract
+ERROR_TERMS = ('speed', 'spot4', 'vanna', 'volga', 'ultima', 'zomma', 'charm', 'color', 'veta', 'time',
+               'rate', 'rate_spot', 'rate_vol', 'rate_time')
+
+class StreamingRepricer:
+    """Keep a priced chain in memory and update it on spot/rate/vol ticks.
+
+    Each contract is anchored at the parameters it was last fully priced at.
+    On a tick, prices are moved with a delta-gamma-vega-rho-theta expansion
+    around the anchor. The neglected terms of the expansion in spot, vol, rate
+    and time to expiry, including their cross terms (vanna, charm, veta,
+    zomma, ...), are summed and scaled by ERROR_SAFETY into a per-contract
+    error estimate. Contracts whose estimate exceeds `tolerance`, whose d1/d2
+    moved by more than MAX_D_MOVE standard deviations, or that reach expiry
+    are fully repriced and re-anchored, so small moves cost a handful of
+    vector operations.
+
+    Volatility can be given per tick as a scalar, an array, or a VolSurface.
+    Surfaces are read sticky-strike and only re-queried when a different
+    surface object, or a modified one, is passed.
+    """
+
+    # Multiplier on the summed leading neglected terms, covering the ones beyond them
+    ERROR_SAFETY = 3.0
+    # Largest move of d1/d2, in standard deviations, repriced from the expansion
+    MAX_D_MOVE = 0.75
+
+    def __init__(self, model, K, T, option_type, S, r, vol, tolerance=1e-4):
+        self.logger = logging.getLogger(__name__)
+        self.model = model
+        self.tolerance = tolerance
+        self.K = np.asarray(K, dtype=float)
+        self.T = np.asarray(T, dtype=float).copy()
+        self.is_call = model._is_call(option_type, self.K.shape).copy()
+        self._surface_key = None
+        self._sigma = None
+        sigma = self._resolve_vol(vol)
+
+        n = self.K.size
+        self._S0 = np.full(n, float(S))
+        self._r0 = np.full(n, float(r))
+        self._sigma0 = sigma.copy()
+        self._elapsed = np.zeros(n)
+        self._anchor = {}
+        self._reprice(np.arange(n), self._S0, self._r0, sigma, self.T)
+
+    def _resolve_vol(self, vol):
+        """Turn a scalar, array or VolSurface into a per-contract sigma array."""
+        if hasattr(vol, 'sigma') and callable(vol.sigma):
+            key = (id(vol), getattr(vol, 'version', None))
+            if key != self._surface_key:
+                self._sigma = np.broadcast_to(vol.sigma(self.K, self.T), self.K.shape).astype(float)
+                self._surface_key = key
+            return self._sigma
+        self._surface_key = None
+        return np.broadcast_to(np.asarray(vol, dtype=float), self.K.shape)
+
+    def _reprice(self, idx, S, r, sigma, T):
+        """Fully reprice the contracts at idx and make their current parameters the new anchor."""
+        K, is_call = self.K[idx], self.is_call[idx]
+        price = self.model.price_batch(S, K, T, r, sigma, is_call)
+        greeks = self.model.greeks(S, K, T, r, sigma, is_call)
+
+        gamma, vega, theta, rho = greeks['gamma'], greeks['vega'], greeks['theta'], greeks['rho']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sqrt_T = np.sqrt(T)
+            sigma_sqrt_T = sigma * sqrt_T
+            d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / sigma_sqrt_T
+            d2 = d1 - sigma_sqrt_T
+            pdf_d1 = norm_pdf(d1)
+            vanna = -pdf_d1 * d2 / sigma
+            volga = vega * d1 * d2 / sigma
+            # Volga vanishes where d1 * d2 = 0, so the third-order vol term is tracked too
+            ultima = -vega / sigma ** 2 * (d1 * d2 * (1 - d1 * d2) + d1 ** 2 + d2 ** 2)
+            speed = -gamma / S * (d1 / sigma_sqrt_T + 1)
+            # Fourth derivative in spot, which dominates near the money where speed is small
+            spot4 = (-speed * (d1 + sigma_sqrt_T) / (S * sigma_sqrt_T) - gamma / (S * sigma_sqrt_T) ** 2
+                     + gamma * (d1 + sigma_sqrt_T) / (S ** 2 * sigma_sqrt_T))
+            zomma = gamma * (d1 * d2 - 1) / sigma
+            # Derivatives in calendar time; those of theta and vega follow from the Black-Scholes PDE
+            drift = (2 * r * T - d2 * sigma_sqrt_T) / (2 * T * sigma_sqrt_T)
+            charm = -pdf_d1 * drift
+            color = pdf_d1 / (2 * S * T * sigma_sqrt_T) * (1 + 2 * T * drift * d1)
+            theta_decay = r * theta - r * S * charm - 0.5 * (sigma * S) ** 2 * color
+            veta = r * vega - r * S * vanna - sigma * S ** 2 * gamma - 0.5 * (sigma * S) ** 2 * zomma
+            # Second derivatives in r, which the first-order rho term leaves out
+            rate_convexity = T * (vega / sigma - rho)
+            rate_spot = vega / (S * sigma)
+            rate_vol = -vega * d1 * sqrt_T / sigma
+            rate_time = price + r * rho - S * greeks['delta'] - r * vega / sigma + 0.5 * S * pdf_d1 * d1
+            # Sensitivities of d1 and d2, in standard deviations, to spot and vol moves
+            d_spot = 1 / (S * sigma_sqrt_T)
+            d_vol = np.maximum(np.abs(d1), np.abs(d2)) / sigma
+
+        if not self._anchor:
+            n = self.K.size
+            names = ['price', *greeks, 'vanna', 'volga', 'd_spot', 'd_vol', *(f'err_{term}' for term in ERROR_TERMS)]
+            self._anchor = {name: np.full(n, np.nan) for name in names}
+        a = self._anchor
+        a['price'][idx] = price
+        for name, values in greeks.items():
+            a[name][idx] = values
+        # Expired and invalid contracts carry no higher-order risk
+        a['vanna'][idx] = np.nan_to_num(vanna)
+        a['volga'][idx] = np.nan_to_num(volga)
+        # Expired contracts are repriced on every tick, so their infinite sensitivities are dropped
+        a['d_spot'][idx] = np.nan_to_num(d_spot, posinf=0.0)
+        a['d_vol'][idx] = np.nan_to_num(d_vol, posinf=0.0)
+        # Magnitudes of the neglected terms, pre-scaled by their Taylor coefficients
+        for term, values, scale in (('speed', speed, 1 / 6), ('spot4', spot4, 1 / 24), ('vanna', vanna, 1),
+                                    ('volga', volga, 0.5), ('ultima', ultima, 1 / 6), ('zomma', zomma, 0.5),
+                                    ('charm', charm, 1), ('color', color, 0.5), ('veta', veta, 1),
+                                    ('time', theta_decay, 0.5),
+                                    ('rate', rate_convexity, 0.5), ('rate_spot', rate_spot, 1),
+                                    ('rate_vol', rate_vol, 1), ('rate_time', rate_time, 1)):
+            a[f'err_{term}'][idx] = scale * np.abs(np.nan_to_num(values))
+
+        self._S0[idx] = S
+        self._r0[idx] = r
+        self._sigma0[idx] = sigma
+        self.T[idx] = T
+        self._elapsed[idx] = 0.0
+
+    def update(self, spot, rate=None, vol=None, elapsed=0.0):
+        """Apply one tick and return the updated prices and Greeks.
+
+        spot is the new underlying price, rate and vol default to their anchor
+        values, and elapsed is the time in years since the previous tick. The
+        result dict holds 'price', the five Greeks and 'repriced', the number of
+        contracts that needed a full reprice on this tick.
+        """
+        a = self._anchor
+        dS = spot - self._S0
+        abs_dS = np.abs(dS)
+        dS2 = dS * dS
+        price = a['delta'] * dS
+        price += a['price']
+        price += 0.5 * a['gamma'] * dS2
+        error = a['err_speed'] * abs_dS * dS2
+        error += a['err_spot4'] * dS2 * dS2
+        d_move = a['d_spot'] * abs_dS
+
+        if vol is None:
+            sigma = self._sigma0
+            dsigma = 0.0
+        else:
+            sigma = self._resolve_vol(vol)
+            dsigma = sigma - self._sigma0
+            price += a['vega'] * dsigma
+            abs_dsigma = np.abs(dsigma)
+            error += a['err_vanna'] * abs_dS * abs_dsigma
+            error += a['err_volga'] * dsigma * dsigma
+            error += a['err_ultima'] * abs_dsigma * dsigma * dsigma
+            error += a['err_zomma'] * dS2 * abs_dsigma
+            d_move += a['d_vol'] * abs_dsigma
+        if rate is not None:
+            dr = rate - self._r0
+            price += a['rho'] * dr
+            abs_dr = np.abs(dr)
+            error += a['err_rate'] * dr * dr
+            error += a['err_rate_spot'] * abs_dS * abs_dr
+            if vol is not None:
+                error += a['err_rate_vol'] * abs_dsigma * abs_dr
+        if elapsed:
+            self._elapsed += elapsed
+        if self._elapsed.any():
+            e = self._elapsed
+            price += a['theta'] * e
+            # Theta, delta, gamma, vega and rho all drift with time to expiry
+            error += a['err_time'] * e * e
+            error += a['err_charm'] * abs_dS * e
+            error += a['err_color'] * dS2 * e
+            if vol is not None:
+                error += a['err_veta'] * abs_dsigma * e
+            if rate is not None:
+                error += a['err_rate_time'] * abs_dr * e
+        # The estimate is the leading neglected terms only; the safety factor covers the rest
+        error *= self.ERROR_SAFETY
+        stale = error > self.tolerance
+        stale |= d_move > self.MAX_D_MOVE
+        # Contracts reaching expiry, and expired ones whose payoff kinks at the strike
+        stale |= ((self._elapsed >= self.T) & (self.T > 0)) | (self.T == 0)
+
+        stale = np.flatnonzero(stale)
+        if stale.size:
+            r_now = self._r0[stale] if rate is None else np.full(stale.size, float(rate))
+            T_now = np.maximum(self.T[stale] - self._elapsed[stale], 0.0)
+            self._reprice(stale, np.full(stale.size, float(spot)), r_now, sigma[stale], T_now)
+            price[stale] = a['price'][stale]
+            if stale.size == self.K.size:
+                dS = dsigma = 0.0
+
+        result = {
+            'price': price,
+            'delta': a['delta'] + a['gamma'] * dS + a['vanna'] * dsigma,
+            'gamma': a['gamma'].copy(),
+            'vega': a['vega'] + a['vanna'] * dS + a['volga'] * dsigma,
+            'theta': a['theta'].copy(),
+            'rho': a['rho'].copy(),
+            'repriced': int(stale.size),
+        }
+        if stale.size and stale.size < self.K.size:
+            for name in ('delta', 'gamma', 'vega'):
+                result[name][stale] = a[name][stale]
+        return result
+
+    def stream(self, ticks):
+        """Consume an iterable of (spot, rate, vol) ticks, yielding update() results."""
+        for spot, rate, vol in ticks:
+            yield self.update(spot, rate, vol)
+
+    async def astream(self, ticks):
+        """Async counterpart of stream() for async iterables of (spot, rate, vol) ticks."""
+        async for spot, rate, vol in ticks:
+            yield self.update(spot, rate, vol)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from black_scholes_model import BlackScholesModel
+
+def generate_option_chain(n_contracts, spot=100.0, r=0.05, seed=0, call_fraction=0.5,
+                          strike_distribution='uniform', strike_range=(0.5, 1.5),
+                          expiry_distribution='uniform', expiry_range=(1 / 365, 2.0),
+                          base_vol=0.25, smile=0.4, noise=0.01):
+    """Generate a deterministic synthetic option chain in the preprocessed layout.
+
+    Strikes are drawn relative to spot either uniformly over strike_range or
+    normally around spot; expiries are uniform or exponential (clustered at the
+    front) over expiry_range, in years. Implied vols follow a quadratic smile in
+    log-moneyness, and lastPrice is the Black-Scholes price at that vol with
+    multiplicative noise. The same seed always gives the same chain.
+    """
+    rng = np.random.default_rng(seed)
+    lo, hi = strike_range
+    if strike_distribution == 'uniform':
+        moneyness = rng.uniform(lo, hi, n_contracts)
+    elif strike_distribution == 'normal':
+        moneyness = np.clip(rng.normal(1.0, (hi - lo) / 6, n_contracts), lo, hi)
+    else:
+        raise ValueError("strike_distribution must be 'uniform' or 'normal'")
+
+    t_lo, t_hi = expiry_range
+    if expiry_distribution == 'uniform':
+        T = rng.uniform(t_lo, t_hi, n_contracts)
+    elif expiry_distribution == 'exponential':
+        T = np.clip(t_lo + rng.exponential((t_hi - t_lo) / 4, n_contracts), t_lo, t_hi)
+    else:
+        raise ValueError("expiry_distribution must be 'uniform' or 'exponential'")
+
+    strike = np.round(spot * moneyness, 2)
+    option_type = np.where(rng.random(n_contracts) < call_fraction, 'call', 'put')
+    implied_vol = base_vol + smile * np.log(strike / spot) ** 2
+    price = BlackScholesModel().price_batch(spot, strike, T, r, implied_vol, option_type)
+    last_price = np.round(price * (1 + noise * rng.standard_normal(n_contracts)), 2)
+
+    return pd.DataFrame({
+        'strike': strike,
+        'lastPrice': np.maximum(last_price, 0.01),
+        'impliedVolatility': implied_vol,
+        'optionType': option_type,
+        'TimeToExpiration': T,
+        'UnderlyingPrice': spot,
+        'ImpliedVolatility': implied_vol,
+    })
+
+def generate_stock_history(n_days=504, spot=100.0, vol=0.25, seed=0, end_date='2024-01-01'):
+    """Generate a deterministic daily OHLC history ending at spot, in the yfinance layout."""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(-0.5 * vol ** 2 / 252, vol / np.sqrt(252), n_days)
+    close = spot * np.exp(np.cumsum(returns) - returns.sum())
+    open_ = close * np.exp(rng.normal(0, vol / np.sqrt(252) / 4, n_days))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, vol / np.sqrt(252) / 2, n_days)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, vol / np.sqrt(252) / 2, n_days)))
+    index = pd.bdate_range(end=end_date, periods=n_days, name='Date')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close,
+                         'Adj Close': close, 'Volume': rng.integers(10 ** 6, 10 ** 7, n_days)}, index=index)
+
+def split_calls_puts(chain):
+    """Split a synthetic chain into raw yfinance-style calls and puts frames."""
+    raw = chain[['strike', 'lastPrice', 'impliedVolatility']]
+    is_call = (chain['optionType'] == 'call').to_numpy()
+    return raw[is_call].reset_index(drop=True), raw[~is_call].reset_index(drop=True)
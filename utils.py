@@ -1,16 +1,41 @@
+import asyncio
 import logging
+import threading
 import time
 from functools import wraps
 
-def setup_logging():
+def setup_logging(level='INFO'):
     """Set up logging configuration."""
-    logging.basicConfig(level=logging.DEBUG,
+    logging.basicConfig(level=level,
                         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
                         filename='black_scholes_analysis.log')
 
-def retry_on_exception(max_attempts, delay):
-    """Decorator to retry a function on exception."""
+def retry_on_exception(max_attempts, delay, backoff=2.0, max_delay=30.0):
+    """Decorator to retry a function on exception with exponential backoff.
+
+    Works on both regular functions and coroutine functions; the latter wait
+    with asyncio.sleep so they don't block the event loop.
+    """
+    def next_delay(attempts):
+        return min(delay * backoff ** (attempts - 1), max_delay)
+
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                attempts = 0
+                while attempts < max_attempts:
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        attempts += 1
+                        if attempts == max_attempts:
+                            raise
+                        wait = next_delay(attempts)
+                        logging.warning(f"Attempt {attempts} failed. Retrying in {wait} seconds. Error: {str(e)}")
+                        await asyncio.sleep(wait)
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             attempts = 0
@@ -21,7 +46,37 @@ def retry_on_exception(max_attempts, delay):
                     attempts += 1
                     if attempts == max_attempts:
                         raise
-                    logging.warning(f"Attempt {attempts} failed. Retrying in {delay} seconds. Error: {str(e)}")
-                    time.sleep(delay)
+                    wait = next_delay(attempts)
+                    logging.warning(f"Attempt {attempts} failed. Retrying in {wait} seconds. Error: {str(e)}")
+                    time.sleep(wait)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` calls per second with bursts up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token, returning how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
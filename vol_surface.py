@@ -0,0 +1,122 @@
+import numpy as np
+import logging
+
+class VolSurface:
+    """Implied-volatility surface on a moneyness (K / S) x TimeToExpiration grid.
+
+    Each expiry slice is resampled once onto a shared, sorted moneyness grid and
+    stored as total variance (sigma^2 * T). Per-cell slopes along moneyness are
+    precomputed, so a lookup for N (K, T) points is a pair of searchsorted calls
+    plus a few vectorized multiply-adds. Between expiries the surface is linear
+    in total variance; outside the grid it is extrapolated flat in volatility.
+    """
+
+    def __init__(self, spot, moneyness_grid):
+        self.logger = logging.getLogger(__name__)
+        self.spot = float(spot)
+        self.moneyness = np.asarray(moneyness_grid, dtype=float)
+        if self.moneyness.ndim != 1 or self.moneyness.size < 2 or np.any(np.diff(self.moneyness) <= 0):
+            raise ValueError("moneyness_grid must be a strictly increasing 1-D array with at least two points")
+        self._dm = np.diff(self.moneyness)
+        self.expiries = np.empty(0)
+        self._total_variance = np.empty((0, self.moneyness.size))
+        self._slopes = np.empty((0, self.moneyness.size - 1))
+        # Bumped on every slice change so consumers can tell a modified surface apart
+        self.version = 0
+
+    @classmethod
+    def from_options(cls, options, spot=None, n_moneyness=50):
+        """Build a surface from a preprocessed options DataFrame.
+
+        Uses the 'strike', 'TimeToExpiration' and 'ImpliedVolatility' columns and
+        the 'UnderlyingPrice' column for spot unless one is given.
+        """
+        if spot is None:
+            spot = options['UnderlyingPrice'].iloc[0]
+        valid = cls._valid_quotes(options['strike'].to_numpy(dtype=float),
+                                  options['TimeToExpiration'].to_numpy(dtype=float),
+                                  options['ImpliedVolatility'].to_numpy(dtype=float))
+        quotes = options[valid]
+        if quotes.empty:
+            raise ValueError("No valid implied volatility quotes to build a surface from")
+
+        moneyness = quotes['strike'].to_numpy(dtype=float) / spot
+        grid = np.linspace(moneyness.min(), moneyness.max(), n_moneyness)
+        if grid[0] == grid[-1]:
+            grid = np.array([grid[0] * 0.99, grid[0] * 1.01])
+        surface = cls(spot, grid)
+        for T, slice_quotes in quotes.groupby('TimeToExpiration', sort=True):
+            surface.update_slice(T, slice_quotes['strike'], slice_quotes['ImpliedVolatility'])
+        surface.logger.info(f"Built volatility surface with {surface.expiries.size} expiries "
+                            f"and {surface.moneyness.size} moneyness points")
+        return surface
+
+    @staticmethod
+    def _valid_quotes(strikes, T, ivs):
+        return np.isfinite(strikes) & np.isfinite(T) & np.isfinite(ivs) & (strikes > 0) & (T > 0) & (ivs > 0)
+
+    def update_slice(self, T, strikes, implied_vols):
+        """Insert or replace a single expiry slice, refitting only that slice."""
+        strikes = np.asarray(strikes, dtype=float)
+        implied_vols = np.asarray(implied_vols, dtype=float)
+        valid = self._valid_quotes(strikes, np.full(strikes.shape, T, dtype=float), implied_vols)
+        if T <= 0 or not valid.any():
+            self.logger.warning(f"Skipping volatility slice T={T}: no valid quotes")
+            return
+
+        moneyness = strikes[valid] / self.spot
+        order = np.argsort(moneyness)
+        # np.interp clamps to the end values, i.e. flat extrapolation in moneyness
+        vols = np.interp(self.moneyness, moneyness[order], implied_vols[valid][order])
+        total_variance = vols ** 2 * T
+        slopes = np.diff(total_variance) / self._dm
+
+        i = np.searchsorted(self.expiries, T)
+        if i < self.expiries.size and np.isclose(self.expiries[i], T):
+            self._total_variance[i] = total_variance
+            self._slopes[i] = slopes
+        else:
+            self.expiries = np.insert(self.expiries, i, T)
+            self._total_variance = np.insert(self._total_variance, i, total_variance, axis=0)
+            self._slopes = np.insert(self._slopes, i, slopes, axis=0)
+        self.version += 1
+
+    def remove_slice(self, T):
+        """Drop the expiry slice at T if present."""
+        i = np.searchsorted(self.expiries, T)
+        if i < self.expiries.size and np.isclose(self.expiries[i], T):
+            self.expiries = np.delete(self.expiries, i)
+            self._total_variance = np.delete(self._total_variance, i, axis=0)
+            self._slopes = np.delete(self._slopes, i, axis=0)
+            self.version += 1
+
+    def _row_total_variance(self, rows, m, j):
+        return self._total_variance[rows, j] + self._slopes[rows, j] * (m - self.moneyness[j])
+
+    def sigma(self, K, T, S=None):
+        """Look up volatility for arrays of strikes and times to expiration."""
+        if self.expiries.size == 0:
+            raise ValueError("Volatility surface has no expiry slices")
+        spot = self.spot if S is None else S
+        K, T, spot = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (K, T, spot)))
+
+        m = np.clip(K / spot, self.moneyness[0], self.moneyness[-1])
+        j = np.clip(np.searchsorted(self.moneyness, m, side='right') - 1, 0, self.moneyness.size - 2)
+
+        last = self.expiries.size - 1
+        hi = np.clip(np.searchsorted(self.expiries, T), 0, last)
+        lo = np.clip(hi - 1, 0, last)
+        T_lo = self.expiries[lo]
+        T_hi = self.expiries[hi]
+        w_lo = self._row_total_variance(lo, m, j)
+        w_hi = self._row_total_variance(hi, m, j)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(hi == lo, 0.0, (T - T_lo) / (T_hi - T_lo))
+            inside = (T >= self.expiries[0]) & (T <= self.expiries[-1])
+            w = w_lo + weight * (w_hi - w_lo)
+            sigma_inside = np.sqrt(w / T)
+            # Flat volatility extrapolation before the first and after the last expiry
+            sigma_edge = np.where(T < self.expiries[0], np.sqrt(w_lo / T_lo), np.sqrt(w_hi / T_hi))
+        sigma = np.where(inside, sigma_inside, sigma_edge)
+        return np.where(np.isnan(K) | np.isnan(T), np.nan, sigma)
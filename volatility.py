@@ -0,0 +1,189 @@
+import numpy as np
+from scipy.signal import lfilter
+import logging
+
+ESTIMATORS = ('close_to_close', 'ewma', 'parkinson', 'garman_klass', 'yang_zhang')
+
+def _bar_terms(open_, high, low, close, prev_close):
+    """Per-bar log terms shared by all estimators; arrays are (n_bars, n_tickers)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_hl = np.log(high / low)
+        log_co = np.log(close / open_)
+        log_ho, log_hc = np.log(high / open_), np.log(high / close)
+        log_lo, log_lc = np.log(low / open_), np.log(low / close)
+        return {
+            'r': np.log(close / prev_close),
+            'hl2': log_hl ** 2,
+            'gk': 0.5 * log_hl ** 2 - (2 * np.log(2) - 1) * log_co ** 2,
+            'o': np.log(open_ / prev_close),
+            'co': log_co,
+            'rs': log_hc * log_ho + log_lc * log_lo,
+        }
+
+# Which validity mask gates each windowed quantity
+_MASK_FOR = {'r': 'r', 'r2': 'r', 'hl2': 'hl2', 'gk': 'gk', 'o': 'yz', 'o2': 'yz', 'co': 'yz', 'co2': 'yz', 'rs': 'yz'}
+
+def _yang_zhang_k(window):
+    return 0.34 / (1.34 + (window + 1) / (window - 1))
+
+def _variances(sums, counts, window, periods_per_year):
+    """Annualized volatilities from windowed sums; NaN wherever the window is not full."""
+    n = window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        close_var = (sums['r2'] - sums['r'] ** 2 / n) / (n - 1)
+        overnight_var = (sums['o2'] - sums['o'] ** 2 / n) / (n - 1)
+        open_close_var = (sums['co2'] - sums['co'] ** 2 / n) / (n - 1)
+        k = _yang_zhang_k(n)
+        variances = {
+            'close_to_close': np.where(counts['r'] == n, close_var, np.nan),
+            'parkinson': np.where(counts['hl2'] == n, sums['hl2'] / (4 * np.log(2) * n), np.nan),
+            'garman_klass': np.where(counts['gk'] == n, sums['gk'] / n, np.nan),
+            'yang_zhang': np.where(counts['yz'] == n,
+                                   overnight_var + k * open_close_var + (1 - k) * sums['rs'] / n, np.nan),
+        }
+        return {name: np.sqrt(np.maximum(var, 0) * periods_per_year) for name, var in variances.items()}
+
+def _windowed(terms):
+    """Map bar terms onto the quantities whose windowed sums the estimators need."""
+    r, o, co = terms['r'], terms['o'], terms['co']
+    values = {'r': r, 'r2': r ** 2, 'hl2': terms['hl2'], 'gk': terms['gk'],
+              'o': o, 'o2': o ** 2, 'co': co, 'co2': co ** 2, 'rs': terms['rs']}
+    valid = {'r': np.isfinite(r), 'hl2': np.isfinite(terms['hl2']), 'gk': np.isfinite(terms['gk']),
+             'yz': np.isfinite(o) & np.isfinite(co) & np.isfinite(terms['rs'])}
+    return values, valid
+
+class VolatilityEstimator:
+    """Historical volatility estimators over OHLC arrays for many tickers at once.
+
+    Inputs are (n_bars, n_tickers) arrays (1-D arrays are treated as a single
+    ticker). All rolling estimators are computed from cumulative sums of the
+    per-bar terms, so the cost is one pass over the data regardless of the
+    window length. EWMA uses the RiskMetrics recursion via a linear filter.
+    """
+
+    def __init__(self, window=252, ewma_lambda=0.94, periods_per_year=252):
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.logger = logging.getLogger(__name__)
+        self.window = window
+        self.ewma_lambda = ewma_lambda
+        self.periods_per_year = periods_per_year
+
+    @staticmethod
+    def _as_2d(*arrays):
+        arrays = [np.asarray(a, dtype=float) for a in arrays]
+        return [a[:, None] if a.ndim == 1 else a for a in arrays]
+
+    def estimate(self, open_, high, low, close):
+        """Return a dict of estimator name -> annualized rolling volatility, same shape as close."""
+        squeeze = np.ndim(close) == 1
+        open_, high, low, close = self._as_2d(open_, high, low, close)
+        prev_close = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+        values, valid = _windowed(_bar_terms(open_, high, low, close, prev_close))
+
+        n = self.window
+        def rolling(x, mask):
+            padded = np.vstack([np.zeros((1, x.shape[1])), np.cumsum(np.where(mask, x, 0.0), axis=0)])
+            out = np.full(x.shape, np.nan)
+            out[n - 1:] = padded[n:] - padded[:-n]
+            return out
+
+        sums = {name: rolling(x, valid[_MASK_FOR[name]]) for name, x in values.items()}
+        counts = {name: rolling(np.ones(mask.shape), mask) for name, mask in valid.items()}
+        result = _variances(sums, counts, n, self.periods_per_year)
+        result['ewma'] = self._ewma(values['r'], valid['r'])
+
+        if squeeze:
+            result = {name: vol[:, 0] for name, vol in result.items()}
+        return {name: result[name] for name in ESTIMATORS}
+
+    def _ewma(self, r, valid):
+        lam = self.ewma_lambda
+        # Missing returns are treated as zero moves once a ticker has started trading
+        r2 = np.where(valid, r ** 2, 0.0)
+        started = np.cumsum(valid, axis=0) > 0
+        # Seed each ticker's variance with its first squared return: backfilling that
+        # value and starting the filter from it keeps the recursion flat until then
+        seed = r2[np.argmax(valid, axis=0), np.arange(r2.shape[1])]
+        r2 = np.where(started, r2, seed)
+        variance, _ = lfilter([1 - lam], [1, -lam], r2, axis=0, zi=(lam * seed)[None, :])
+        return np.where(started, np.sqrt(variance * self.periods_per_year), np.nan)
+
+    def incremental(self, open_, high, low, close):
+        """Seed an IncrementalVolatility from history so new bars can be applied in O(1)."""
+        return IncrementalVolatility(self, open_, high, low, close)
+
+class IncrementalVolatility:
+    """Running estimator state for many tickers, updated one bar at a time.
+
+    Keeps a ring buffer of the last `window` per-bar terms and their running
+    sums, so update() adds the new bar and drops the oldest in O(1) per ticker
+    instead of recomputing the window. Sums are rebuilt from the buffer once
+    per window to stop floating-point drift from accumulating.
+    """
+
+    def __init__(self, estimator, open_, high, low, close):
+        self.logger = logging.getLogger(__name__)
+        self.window = estimator.window
+        self.ewma_lambda = estimator.ewma_lambda
+        self.periods_per_year = estimator.periods_per_year
+        open_, high, low, close = VolatilityEstimator._as_2d(open_, high, low, close)
+        n_tickers = close.shape[1]
+        prev_close = np.vstack([np.full((1, n_tickers), np.nan), close[:-1]])
+        values, valid = _windowed(_bar_terms(open_, high, low, close, prev_close))
+
+        # Seed the ring buffers with the last `window` bars, padding short histories with invalid rows
+        def tail(x, fill):
+            x = x[-self.window:]
+            pad = np.full((self.window - x.shape[0], n_tickers), fill, dtype=x.dtype)
+            return np.vstack([pad, x])
+        self._values = {name: tail(x, np.nan) for name, x in values.items()}
+        self._valid = {name: tail(mask, False) for name, mask in valid.items()}
+        self._pos = 0
+        self._updates = 0
+        self._resync()
+
+        ewma = estimator._ewma(values['r'], valid['r'])[-1] if close.shape[0] else np.full(n_tickers, np.nan)
+        self._ewma_var = ewma ** 2 / self.periods_per_year
+        self.last_close = close[-1] if close.shape[0] else np.full(n_tickers, np.nan)
+
+    def _resync(self):
+        self._sums = {name: np.where(self._valid[_MASK_FOR[name]], x, 0.0).sum(axis=0)
+                      for name, x in self._values.items()}
+        self._counts = {name: mask.sum(axis=0) for name, mask in self._valid.items()}
+
+    def update(self, open_, high, low, close):
+        """Apply one new bar per ticker (1-D arrays of length n_tickers) and return current volatilities."""
+        open_, high, low, close = (np.asarray(a, dtype=float)[None, :] for a in (open_, high, low, close))
+        values, valid = _windowed(_bar_terms(open_, high, low, close, self.last_close[None, :]))
+
+        pos = self._pos
+        for name, x in values.items():
+            mask_name = _MASK_FOR[name]
+            old = np.where(self._valid[mask_name][pos], self._values[name][pos], 0.0)
+            new = np.where(valid[mask_name][0], x[0], 0.0)
+            self._sums[name] += new - old
+            self._values[name][pos] = x[0]
+        for name, mask in valid.items():
+            self._counts[name] += mask[0].astype(int) - self._valid[name][pos].astype(int)
+            self._valid[name][pos] = mask[0]
+
+        r = values['r'][0]
+        lam = self.ewma_lambda
+        seeded = np.isfinite(self._ewma_var)
+        self._ewma_var = np.where(valid['r'][0],
+                                  np.where(seeded, lam * self._ewma_var + (1 - lam) * r ** 2, r ** 2),
+                                  self._ewma_var)
+
+        self.last_close = np.where(np.isfinite(close[0]), close[0], self.last_close)
+        self._pos = (pos + 1) % self.window
+        self._updates += 1
+        if self._updates % self.window == 0:
+            self._resync()
+        return self.current()
+
+    def current(self):
+        """Return the current annualized volatility per estimator as 1-D arrays over tickers."""
+        result = _variances(self._sums, self._counts, self.window, self.periods_per_year)
+        result['ewma'] = np.sqrt(self._ewma_var * self.periods_per_year)
+        return {name: result[name] for name in ESTIMATORS}